@@ -0,0 +1,188 @@
+""" This module contains batch solving of many Sudoku puzzles over a process pool. """
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from os import cpu_count
+
+from sudoku import (
+    CELLS,
+    COL_UNITS,
+    HOUSE_UNITS,
+    PEER_INDICES,
+    ROW_UNITS,
+    Sudoku,
+    read_puzzle,
+)
+from solution_cache import PersistentSolutionCache
+from sudokuai import SudokuAI
+
+# numpy is optional and slow to import, only solve_vectorized needs it. It is imported,
+# and the matrices built, by numpy_matrices() on first use.
+MATRICES = dict()
+
+
+def numpy_matrices():
+    """Returns numpy, the peer matrix and the unit matrix, importing and building them on first use.
+
+    The cell x cell peer matrix and unit x cell membership matrix index cell (row, col)
+    as 9 * (row - 1) + (col - 1). Raises ImportError if numpy is not installed.
+    """
+    if not MATRICES:
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("solve_vectorized requires numpy.") from None
+        peer_matrix = np.zeros((81, 81), dtype=np.float32)
+        for index, peers in enumerate(PEER_INDICES):
+            peer_matrix[index, list(peers)] = 1
+        unit_matrix = np.zeros((27, 81), dtype=np.float32)
+        for unit, cells in enumerate(
+            [*ROW_UNITS.values(), *COL_UNITS.values(), *HOUSE_UNITS.values()]
+        ):
+            unit_matrix[unit, [9 * (row - 1) + (col - 1) for row, col in cells]] = 1
+        MATRICES.update(np=np, peer=peer_matrix, unit=unit_matrix)
+    return MATRICES["np"], MATRICES["peer"], MATRICES["unit"]
+
+
+def solve_puzzle(puzzle, engine="mac", cache=None):
+    """Solves a {(row, col): value} puzzle and returns the solution dictionary, None if unsolvable."""
+    sudoku = Sudoku(mode="custom", puzzle=puzzle)
+    return SudokuAI(sudoku, engine=engine, cache=cache).solve()
+
+
+def solve_chunk(chunk, engine="mac", cache_path=None):
+    """Solves a list of puzzle paths or dictionaries and returns (puzzle, solution) pairs.
+
+    None puzzles, standing for unreadable input, get None solutions. With cache_path
+    solutions are looked up in and added to that persistent solution cache.
+    """
+    cache = PersistentSolutionCache(cache_path) if cache_path else None
+    results = []
+    for puzzle in chunk:
+        if puzzle is None:
+            results.append((puzzle, None))
+            continue
+        grid = read_puzzle(puzzle) if isinstance(puzzle, str) else puzzle
+        results.append((puzzle, solve_puzzle(grid, engine, cache)))
+    if cache is not None:
+        cache.close()
+    return results
+
+
+def chunks(puzzles, chunksize):
+    """Yields lists of up to chunksize puzzles."""
+    puzzles = iter(puzzles)
+    while True:
+        chunk = list(islice(puzzles, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def next_results(pending, ordered):
+    """Removes the next (oldest or first finished) future from pending and returns its results."""
+    if ordered:
+        return pending.popleft().result()
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    future = done.pop()
+    pending.remove(future)
+    return future.result()
+
+
+def solve_many(
+    puzzles, *, engine="mac", workers=None, chunksize=1, ordered=True, cache_path=None
+):
+    """Solves puzzle paths or {(row, col): value} dictionaries over a process pool.
+
+    Yields (puzzle, solution) pairs in input order, or in completion order if ordered
+    is False. workers=None uses one process per core and workers=1 solves in this
+    process. At most a few chunks per worker are in flight, so puzzles may be a lazy
+    iterable of any length. cache_path names an optional persistent solution cache.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1.")
+    if workers == 1:
+        for chunk in chunks(puzzles, chunksize):
+            yield from solve_chunk(chunk, engine, cache_path)
+        return
+
+    workers = workers or cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks(puzzles, chunksize):
+            pending.append(executor.submit(solve_chunk, chunk, engine, cache_path))
+            if len(pending) >= 4 * workers:
+                yield from next_results(pending, ordered)
+        while pending:
+            yield from next_results(pending, ordered)
+
+
+def candidate_array(puzzles):
+    """Returns the (N, 81, 9) boolean candidate array of {(row, col): value} puzzles."""
+    np = numpy_matrices()[0]
+    candidates = np.ones((len(puzzles), 81, 9), dtype=bool)
+    for n, puzzle in enumerate(puzzles):
+        for (row, col), value in puzzle.items():
+            index = 9 * (row - 1) + (col - 1)
+            candidates[n, index] = False
+            candidates[n, index, value - 1] = True
+    return candidates
+
+
+def unit_product(matrix, array):
+    """Multiplies matrix with the second (cell or unit) axis of an (N, M, 9) array."""
+    n, m, _ = array.shape
+    flat = array.transpose(1, 0, 2).reshape(m, n * 9).astype(matrix.dtype)
+    return (matrix @ flat).reshape(-1, n, 9).transpose(1, 0, 2)
+
+
+def propagate(candidates):
+    """Eliminates naked and hidden singles of all puzzles at once, in place, until nothing changes.
+
+    Returns a boolean array telling which puzzles are still consistent.
+    """
+    np, peer_matrix, unit_matrix = numpy_matrices()
+    count = candidates.sum()
+    while True:
+        singles = candidates & (candidates.sum(axis=2, keepdims=True) == 1)
+        candidates &= unit_product(peer_matrix, singles) == 0
+        counts = unit_product(unit_matrix, candidates)
+        hidden = candidates & (unit_product(unit_matrix.T, counts == 1) > 0)
+        np.copyto(candidates, hidden, where=hidden.any(axis=2, keepdims=True))
+        before, count = count, candidates.sum()
+        if count == before:
+            break
+    return candidates.any(axis=2).all(axis=1) & (counts > 0).all(axis=(1, 2))
+
+
+def solve_vectorized(puzzles, *, engine="mac", blocksize=4096):
+    """Solves puzzle paths or {(row, col): value} dictionaries by NumPy constraint propagation.
+
+    Puzzles are propagated blocksize at a time as one candidate array, only those left
+    undecided are searched by SudokuAI. Yields (puzzle, solution) pairs in input order,
+    None puzzles get None solutions.
+    """
+    numpy_matrices()
+    for chunk in chunks(puzzles, blocksize):
+        grids = [
+            read_puzzle(puzzle) if isinstance(puzzle, str) else puzzle or dict()
+            for puzzle in chunk
+        ]
+        candidates = candidate_array(grids)
+        consistent = propagate(candidates).tolist()
+        decided = (candidates.sum(axis=2) == 1).tolist()
+        digits = (candidates.argmax(axis=2) + 1).tolist()
+        for n, puzzle in enumerate(chunk):
+            if puzzle is None or not consistent[n]:
+                yield puzzle, None
+                continue
+            values = {
+                CELLS[index]: digit
+                for index, digit in enumerate(digits[n])
+                if decided[n][index]
+            }
+            if len(values) == 81:
+                yield puzzle, values
+            else:
+                yield puzzle, solve_puzzle(values, engine)
@@ -0,0 +1,231 @@
+""" This module contains the solver benchmark over the bundled puzzles, or generated ones of other board sizes. """
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from os import listdir
+from os.path import join
+
+from generator import random_grid
+from sudoku import Sudoku, read_puzzle
+from sudokuai import ENGINES, SudokuAI
+
+DIFFICULTIES = ("easy", "medium", "hard")
+PUZZLES_PATH = "assets/puzzles"
+
+
+def percentile(values, fraction):
+    """Returns the nearest-rank percentile of the values."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def generated_puzzles(box, count, givens, seed=0):
+    """Returns {name: puzzle} of count random puzzles of the box size keeping the givens fraction of their cells."""
+    rng = random.Random(seed)
+    puzzles = dict()
+    for number in range(1, count + 1):
+        grid = random_grid(rng, box)
+        cells = rng.sample(sorted(grid), round(givens * len(grid)))
+        puzzles[f"{number:03}"] = {cell: grid[cell] for cell in cells}
+    return puzzles
+
+
+def is_solution(puzzle, solution, box=3):
+    """Checks that the solution completes the puzzle without conflicts."""
+    if solution is None:
+        return False
+    if any(solution.get(cell) != value for cell, value in puzzle.items()):
+        return False
+    return Sudoku(mode="custom", puzzle=solution, box=box).check_goal_state()
+
+
+def run_puzzle(puzzle, engine, repeat, memory, box=3):
+    """Solves the puzzle repeat times and returns its best time, search stats and peak memory."""
+    best = None
+    for _ in range(repeat):
+        ai = SudokuAI(Sudoku(mode="custom", puzzle=puzzle, box=box), engine=engine)
+        start = time.perf_counter()
+        solution = ai.solve()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    solved = is_solution(puzzle, solution, box)
+    result = {"time": best, "solved": solved, **ai.stats}
+    if memory:
+        ai = SudokuAI(Sudoku(mode="custom", puzzle=puzzle, box=box), engine=engine)
+        tracemalloc.start()
+        ai.solve()
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def summarize(results, memory):
+    """Returns the summary of the {name: result} results of a group of puzzles."""
+    times = [result["time"] for result in results.values()]
+    summary = {
+        "puzzles": len(results),
+        "solved": sum(result["solved"] for result in results.values()),
+        "total_time": sum(times),
+        "p50": percentile(times, 0.50),
+        "p90": percentile(times, 0.90),
+        "p99": percentile(times, 0.99),
+        "max": max(times),
+    }
+    for key in ("nodes", "backtracks", "revisions", "pruned"):
+        summary[key] = sum(result[key] for result in results.values())
+    for key in ("max_queue", "max_depth"):
+        summary[key] = max(result[key] for result in results.values())
+    if memory:
+        summary["peak_memory"] = max(
+            result["peak_memory"] for result in results.values()
+        )
+    return summary
+
+
+def run(engine="mac", difficulties=DIFFICULTIES, repeat=1, memory=True):
+    """Benchmarks the engine over the bundled puzzles and returns the report dictionary."""
+    report = {
+        "engine": engine,
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "difficulties": dict(),
+    }
+    for difficulty in difficulties:
+        path = join(PUZZLES_PATH, difficulty)
+        names = sorted(name for name in listdir(path) if name.endswith(".txt"))
+        results = {
+            name: run_puzzle(read_puzzle(join(path, name)), engine, repeat, memory)
+            for name in names
+        }
+        summary = summarize(results, memory)
+        report["difficulties"][difficulty] = {"summary": summary, "puzzles": results}
+    return report
+
+
+def run_generated(
+    engine="bitset", box=5, count=3, givens=0.55, repeat=1, memory=True
+):
+    """Benchmarks the engine over generated partly filled puzzles of the box size and returns the report dictionary.
+
+    The puzzles are reported as a single group named after the board size, e.g. "25x25".
+    """
+    size = box * box
+    report = {
+        "engine": engine,
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "box": box,
+        "givens": givens,
+        "difficulties": dict(),
+    }
+    puzzles = generated_puzzles(box, count, givens)
+    results = {
+        name: run_puzzle(puzzle, engine, repeat, memory, box)
+        for name, puzzle in puzzles.items()
+    }
+    summary = summarize(results, memory)
+    report["difficulties"][f"{size}x{size}"] = {"summary": summary, "puzzles": results}
+    return report
+
+
+def print_report(report, baseline=None):
+    """Prints the per difficulty summary, with ratios to the baseline report if given."""
+    print(f'engine: {report["engine"]}  python: {report["python"]}')
+    columns = ("total_time", "p50", "p90", "p99", "max")
+    columns += ("nodes", "backtracks", "revisions", "pruned", "max_depth")
+    columns += ("peak_memory",)
+    print(f'{"difficulty":<10} {"solved":>7}' + "".join(f"{c:>13}" for c in columns))
+    for difficulty, data in report["difficulties"].items():
+        summary = data["summary"]
+        solved = f'{summary["solved"]}/{summary["puzzles"]}'
+        row = f"{difficulty:<10} {solved:>7}"
+        for column in columns:
+            value = summary.get(column)
+            if value is None:
+                cell = "-"
+            elif isinstance(value, float):
+                cell = f"{value * 1000:.2f}ms"
+            else:
+                cell = str(value)
+            row += f"{cell:>13}"
+        print(row)
+        if baseline and difficulty in baseline["difficulties"]:
+            base = baseline["difficulties"][difficulty]["summary"]
+            row = f'{"  vs base":<10} {"":>7}'
+            for column in columns:
+                if summary.get(column) is None or not base.get(column):
+                    cell = "-"
+                else:
+                    cell = f"x{summary[column] / base[column]:.2f}"
+                row += f"{cell:>13}"
+            print(row)
+
+
+def main(argv=None):
+    """Runs the benchmark from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark SudokuAI over the bundled puzzles."
+    )
+    parser.add_argument("-e", "--engine", choices=ENGINES, default="mac")
+    parser.add_argument(
+        "-d", "--difficulty", choices=DIFFICULTIES, action="append", dest="difficulties"
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="best of N timings")
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the tracemalloc peak memory run"
+    )
+    parser.add_argument(
+        "--box",
+        type=int,
+        choices=(2, 3, 4, 5),
+        help="benchmark generated puzzles with houses of box x box cells instead",
+    )
+    parser.add_argument(
+        "-n", "--puzzles", type=int, default=3, help="number of generated puzzles"
+    )
+    parser.add_argument(
+        "--givens",
+        type=float,
+        default=0.55,
+        help="fraction of generated puzzle cells kept",
+    )
+    parser.add_argument("--json", help="write the full report as JSON to this path")
+    parser.add_argument("--compare", help="JSON report of a previous run to compare to")
+    args = parser.parse_args(argv)
+
+    if args.box is None:
+        report = run(
+            args.engine,
+            args.difficulties or DIFFICULTIES,
+            args.repeat,
+            not args.no_memory,
+        )
+    else:
+        report = run_generated(
+            args.engine,
+            args.box,
+            args.puzzles,
+            args.givens,
+            args.repeat,
+            not args.no_memory,
+        )
+    baseline = None
+    if args.compare:
+        with open(args.compare) as compare:
+            baseline = json.load(compare)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(report, output, indent=2)
+    # Failing puzzles make the run fail, so it can serve as a check
+    summaries = [data["summary"] for data in report["difficulties"].values()]
+    return 0 if all(s["solved"] == s["puzzles"] for s in summaries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+""" This module contains the Sudoku puzzle generator. """
+
+import random
+
+from sudoku import CELLS, get_geometry
+from sudokuai import BitsetSolver
+
+# Fewest clues and most search nodes (spent proving the solution unique) per difficulty.
+# Easy puzzles fall to naked singles alone, hard ones need the most search.
+LEVELS = {
+    "easy": (36, 1),
+    "medium": (27, 12),
+    "hard": (17, None),
+}
+
+
+def band_order(rng, box=3):
+    """Returns a random order of 1 to box * box keeping the bands of box lines together."""
+    bands = rng.sample(range(box), box)
+    return [
+        box * band + line + 1 for band in bands for line in rng.sample(range(box), box)
+    ]
+
+
+def random_grid(rng=random, box=3):
+    """Returns a random complete grid of houses of box x box cells as a {(row, col): value} dictionary."""
+    size = box * box
+    values = rng.sample(range(1, size + 1), size)
+    first_row = {(1, col): value for col, value in enumerate(values, start=1)}
+    grid = BitsetSolver(first_row, box=box).solve()
+    rows, cols = band_order(rng, box), band_order(rng, box)
+    transpose = rng.random() < 0.5
+    shuffled = dict()
+    for row, col in get_geometry(box).cells:
+        value = grid[(rows[row - 1], cols[col - 1])]
+        shuffled[(col, row) if transpose else (row, col)] = value
+    return shuffled
+
+
+def rate(puzzle):
+    """Returns the number of solutions (2 standing for more) and the search nodes spent counting them."""
+    # Rated with naked singles only, the search nodes of LEVELS are counted that way
+    solver = BitsetSolver(puzzle, hidden_singles=False)
+    count = 0
+    for _ in solver.solutions():
+        count += 1
+        if count == 2:
+            break
+    return count, solver.stats["nodes"]
+
+
+def dig(grid, difficulty, rng=random):
+    """Removes clues from the grid in random order while the puzzle stays unique and within the difficulty."""
+    min_clues, max_nodes = LEVELS[difficulty]
+    puzzle = dict(grid)
+    for cell in rng.sample(CELLS, len(CELLS)):
+        if len(puzzle) <= min_clues:
+            break
+        value = puzzle.pop(cell)
+        count, nodes = rate(puzzle)
+        if count != 1 or (max_nodes is not None and nodes > max_nodes):
+            puzzle[cell] = value
+    return puzzle
+
+
+def generate(difficulty="medium", rng=random, attempts=10):
+    """Returns a {(row, col): value} puzzle with a unique solution for the difficulty.
+
+    Hard puzzles are dug from several grids and the one needing the most search is
+    returned, medium ones must need some search.
+    """
+    if difficulty not in LEVELS:
+        raise ValueError(
+            f'Unknown difficulty "{difficulty}", expected one of {tuple(LEVELS)}.'
+        )
+    best, best_nodes = None, -1
+    for _ in range(attempts):
+        puzzle = dig(random_grid(rng), difficulty, rng)
+        nodes = rate(puzzle)[1]
+        if difficulty == "easy" or (difficulty == "medium" and nodes > 1):
+            return puzzle
+        if nodes > best_nodes:
+            best, best_nodes = puzzle, nodes
+        if difficulty == "hard" and nodes > LEVELS["medium"][1]:
+            return puzzle
+    return best
+
+
+if __name__ == "__main__":
+    import sys
+
+    from sudoku import format_puzzle
+
+    print(format_puzzle(generate(*sys.argv[1:2])))
@@ -0,0 +1,104 @@
+""" This module contains the pool of pre-generated puzzles refilled in the background. """
+
+import json
+import threading
+from collections import deque
+from os import replace
+from os.path import exists
+
+from generator import LEVELS, generate
+from sudoku import format_puzzle, parse_puzzle
+
+
+class PuzzlePool:
+
+    """Keeps size ready to play puzzles per difficulty, refilled by a background thread.
+
+    If path is given the pool is loaded from it on start and saved to it on stop, so
+    generated puzzles survive between sessions.
+    """
+
+    def __init__(self, size=5, path=None, difficulties=tuple(LEVELS)):
+        self.size = size
+        self.path = path
+        self.puzzles = {difficulty: deque() for difficulty in difficulties}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+    def start(self):
+        """Loads the saved puzzles and starts the refilling thread."""
+        self.load()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.refill, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops the refilling thread and saves the pool."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.save()
+
+    def pop(self, difficulty):
+        """Returns a puzzle of the difficulty, generating one now only if the pool ran dry."""
+        with self.condition:
+            puzzles = self.puzzles[difficulty]
+            puzzle = puzzles.popleft() if puzzles else None
+            self.condition.notify_all()
+        return puzzle if puzzle is not None else generate(difficulty)
+
+    def count(self, difficulty):
+        """Returns the number of ready puzzles of the difficulty."""
+        with self.condition:
+            return len(self.puzzles[difficulty])
+
+    def next_difficulty(self):
+        """Returns the difficulty with the fewest puzzles below size, None if all are full."""
+        difficulty = min(self.puzzles, key=lambda d: len(self.puzzles[d]))
+        return difficulty if len(self.puzzles[difficulty]) < self.size else None
+
+    def refill(self):
+        """Generates puzzles for the emptiest difficulty until stopped."""
+        while True:
+            with self.condition:
+                while not self.stopped and self.next_difficulty() is None:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                difficulty = self.next_difficulty()
+            puzzle = generate(difficulty)
+            with self.condition:
+                self.puzzles[difficulty].append(puzzle)
+
+    def load(self):
+        """Adds the puzzles saved at path to the pool."""
+        if self.path is None or not exists(self.path):
+            return
+        try:
+            with open(self.path) as pool:
+                saved = json.load(pool)
+        except (OSError, ValueError):
+            return
+        with self.condition:
+            for difficulty, puzzles in saved.items():
+                if difficulty in self.puzzles:
+                    self.puzzles[difficulty].extend(
+                        parse_puzzle(puzzle) for puzzle in puzzles[: self.size]
+                    )
+
+    def save(self):
+        """Writes the pool to path, through a temporary file so a crash cannot truncate it."""
+        if self.path is None:
+            return
+        with self.condition:
+            saved = {
+                difficulty: [format_puzzle(puzzle) for puzzle in puzzles]
+                for difficulty, puzzles in self.puzzles.items()
+            }
+        with open(self.path + ".tmp", "w") as pool:
+            json.dump(saved, pool)
+        replace(self.path + ".tmp", self.path)
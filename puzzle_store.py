@@ -0,0 +1,124 @@
+""" This module contains the packed puzzle store, fixed-width records read through mmap. """
+
+import mmap
+import random
+import struct
+import sys
+from os import listdir
+from os.path import isdir, join
+
+from sudoku import CELLS, read_puzzle
+
+# File layout: header, one index entry per difficulty, then the records grouped by
+# difficulty. A record is 41 bytes, two cells per byte (high nibble first), 0 for blank.
+MAGIC = b"SUDOKUST"
+VERSION = 1
+HEADER = struct.Struct("<8sII")  # magic, version, number of difficulties
+ENTRY = struct.Struct("<16sQQ")  # difficulty name, first record id, record count
+RECORD_SIZE = 41
+
+STORE_PATH = "assets/puzzles.store"
+
+
+def pack(puzzle):
+    """Packs a {(row, col): value} puzzle into a 41-byte record."""
+    values = [puzzle.get(cell, 0) for cell in CELLS] + [0]
+    return bytes((values[i] << 4) | values[i + 1] for i in range(0, 82, 2))
+
+
+def unpack(record):
+    """Unpacks a 41-byte record into a {(row, col): value} puzzle."""
+    puzzle = dict()
+    for i, byte in enumerate(record):
+        for index, value in ((2 * i, byte >> 4), (2 * i + 1, byte & 15)):
+            if value and index < 81:
+                puzzle[CELLS[index]] = value
+    return puzzle
+
+
+def build_store(path, puzzles):
+    """Writes a store from a {difficulty: iterable of puzzles} dictionary."""
+    records = {
+        difficulty: [pack(puzzle) for puzzle in items]
+        for difficulty, items in puzzles.items()
+    }
+    with open(path, "wb") as store:
+        store.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        start = 0
+        for difficulty, items in records.items():
+            store.write(ENTRY.pack(difficulty.encode(), start, len(items)))
+            start += len(items)
+        for items in records.values():
+            store.writelines(items)
+
+
+def build_store_from_directory(path, directory="assets/puzzles"):
+    """Writes a store from a directory with one sub directory of ".txt" puzzles per difficulty."""
+    puzzles = dict()
+    for difficulty in sorted(listdir(directory)):
+        if isdir(join(directory, difficulty)):
+            names = sorted(
+                name
+                for name in listdir(join(directory, difficulty))
+                if name.endswith(".txt")
+            )
+            puzzles[difficulty] = [
+                read_puzzle(join(directory, difficulty, name)) for name in names
+            ]
+    build_store(path, puzzles)
+
+
+class PuzzleStore:
+
+    """Read-only random access to a packed puzzle store by id or difficulty."""
+
+    def __init__(self, path):
+        with open(path, "rb") as store:
+            self.data = mmap.mmap(store.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'"{path}" is not a version {VERSION} puzzle store.')
+        self.index = dict()
+        for i in range(count):
+            entry = ENTRY.unpack_from(self.data, HEADER.size + i * ENTRY.size)
+            name, start, length = entry
+            self.index[name.rstrip(b"\0").decode()] = (start, length)
+        self.offset = HEADER.size + count * ENTRY.size
+        self.length = sum(length for _, length in self.index.values())
+
+    def __len__(self):
+        return self.length
+
+    def close(self):
+        """Unmaps the store."""
+        self.data.close()
+
+    def count(self, difficulty):
+        """Returns the number of puzzles of the difficulty."""
+        return self.index[difficulty][1]
+
+    def get(self, puzzle_id):
+        """Returns the puzzle with the id, ids run over all difficulties in index order."""
+        if not 0 <= puzzle_id < self.length:
+            raise IndexError("Puzzle id out of range.")
+        start = self.offset + puzzle_id * RECORD_SIZE
+        return unpack(self.data[start : start + RECORD_SIZE])
+
+    def get_by_difficulty(self, difficulty, n):
+        """Returns the n-th puzzle of the difficulty."""
+        start, length = self.index[difficulty]
+        if not 0 <= n < length:
+            raise IndexError("Puzzle number out of range.")
+        return self.get(start + n)
+
+    def random(self, difficulty, rng=random):
+        """Returns a random puzzle of the difficulty."""
+        return self.get_by_difficulty(difficulty, rng.randrange(self.count(difficulty)))
+
+
+if __name__ == "__main__":
+    # python puzzle_store.py [directory] [store path]
+    build_store_from_directory(
+        sys.argv[2] if len(sys.argv) > 2 else STORE_PATH,
+        sys.argv[1] if len(sys.argv) > 1 else "assets/puzzles",
+    )
@@ -2,11 +2,16 @@
 
 from sudoku import Sudoku
 from sudokuai import SudokuAI
+from puzzle_pool import PuzzlePool
+from puzzle_store import STORE_PATH, PuzzleStore
+from solution_cache import PersistentSolutionCache, SolutionCache
+from solver_service import SolverService
+from os import environ
+from os.path import exists
 import pygame
 import sys
 import datetime
-import time
-from random import choice, sample
+from random import choice
 
 
 # Meta
@@ -14,6 +19,9 @@ ROW_COUNT = 9
 COLUMN_COUNT = 9
 HOUSE_COUNT = 9
 
+# Frame cap, lower it with SUDOKU_FPS when many games share a host
+FPS = int(environ.get("SUDOKU_FPS", 30))
+
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -26,23 +34,15 @@ PINK = (255, 192, 203)
 RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 
-# Create game
-pygame.init()
-size = width, height = 900, 600 # 600, 400
-screen = pygame.display.set_mode(size)
-pygame.display.set_caption('Sudoku Solver')
+# Digit colors of default, user and hint cells
+DIGIT_COLORS = {0: BLACK, 1: BLUE, 2: PURPLE}
 
+# Window
+size = width, height = 900, 600 # 600, 400
 
-# Fonts
+# Fonts and images
 OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
-small_font = pygame.font.Font(OPEN_SANS, 20)
-medium_font = pygame.font.Font(OPEN_SANS, 26)
-large_font = pygame.font.Font(OPEN_SANS, 36)
-title_font = pygame.font.Font(OPEN_SANS, 70)
-
-# Load splash image
-splash_image = pygame.image.load("assets/images/sudoku_splash.png")
-splash_image = pygame.transform.scale(splash_image, (width, height))
+SPLASH_IMAGE = "assets/images/sudoku_splash.png"
 
 # Board
 BOARD_PADDING = 20
@@ -50,771 +50,779 @@ board_width = ((2 / 3) * width) - (2 * BOARD_PADDING)
 board_height = height - (2 * BOARD_PADDING)
 cell_size = int(min(board_width / COLUMN_COUNT, board_height / ROW_COUNT))
 board_origin = (BOARD_PADDING, BOARD_PADDING)
+cells = [
+    [
+        pygame.Rect(
+            board_origin[0] + 2 * (j // 3) + j * cell_size,
+            board_origin[1] + 2 * (i // 3) + i * cell_size,
+            cell_size,
+            cell_size,
+        )
+        for j in range(COLUMN_COUNT)
+    ]
+    for i in range(ROW_COUNT)
+]
 
-# Create game and AI agent
-game = None
-ai = None
-solve = None
 
-won = False
-highlight = None
-current = (0, 0)
-valid = None
-game_mode = "Easy"
+def side_button(top, button_height=48):
+    """Returns the rect of a button of the side panel."""
+    return pygame.Rect(
+        (2 / 3) * width + BOARD_PADDING,
+        (1 / 3) * height + top,
+        (width / 3) - 2 * BOARD_PADDING,
+        button_height,
+    )
 
-# Time variables
-starting_time = None
-end_time = None
-elapsed_time = None
 
-# Screen variables
-splash = True
-home = False
-instructions = False
-mode = False
-custom = False
+# Home screen buttons
+play_button_rect = pygame.Rect((width / 2) - 115, (height / 2) + 30, 230, 40)
+info_button_rect = pygame.Rect((width / 2) - 115, (height / 2) + 100, 230, 40)
 
+# Mode screen buttons
+MODE_NAMES = ("Easy", "Medium", "Hard", "Custom", "Back")
 
-def make_shadow(text, center, color, shadow_color, font, screen):
-    """Make shadow effect for a given text."""
+# Instructions screen button
+back_button_rect = pygame.Rect((width / 2) - 40, height - 66, 80, 36)
 
-    shadow_text = font.render(text, True, shadow_color)
-    shadow_text_rect = shadow_text.get_rect()
-    shadow_text_rect.center = (center[0] + 1, center[1] + 1)
-    screen.blit(shadow_text, shadow_text_rect)
+# Game screen buttons
+generate_button = side_button(-110, 40)
+time_button = side_button(-110, 40)
+valid_button = side_button(-30)
+ai_button = side_button(-30)
+won_button = side_button(-30)
+play_button = side_button(40)
+solve_button = side_button(40)
+reset_button = side_button(130)
+home_button = side_button(200)
+panel_rect = pygame.Rect((2 / 3) * width, 0, width / 3, height)
 
-    fore_text = font.render(text, True, color)
-    fore_text_rect = fore_text.get_rect()
-    fore_text_rect.center = center
-    screen.blit(fore_text, fore_text_rect)
-    return
 
+def panel_buttons(custom):
+    """Returns the (rect, label) pairs of the side panel buttons of the game screen, in hover priority order.
 
-while True:
-    # Event loop.
+    Some buttons of the custom and game screens share a rect, labels are only
+    meaningful for the given screen.
+    """
+    if custom:
+        return (
+            (reset_button, "Reset"),
+            (home_button, "Home"),
+            (valid_button, "Validate"),
+            (play_button, "Play"),
+            (generate_button, "Generate"),
+        )
+    return (
+        (reset_button, "Reset"),
+        (home_button, "Home"),
+        (solve_button, "Solve"),
+        (ai_button, "AI Move"),
+    )
 
-    for event in pygame.event.get():
 
-        # Quit event.
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
+def draw_house_lines(surface):
+    """Draws the lines in between houses."""
+    for k in (3, 6):
+        offset = 2 * (k // 6)
+        pygame.draw.line(
+            surface,
+            BLACK,
+            (offset + board_origin[0] + k * cell_size, board_origin[1]),
+            (offset + board_origin[0] + k * cell_size, board_origin[1] + 9 * cell_size),
+            2,
+        )
+        pygame.draw.line(
+            surface,
+            BLACK,
+            (board_origin[0], offset + board_origin[1] + k * cell_size),
+            (board_origin[0] + 9 * cell_size, offset + board_origin[1] + k * cell_size),
+            2,
+        )
 
-        # Navigation using arrow keys.
-        if event.type == pygame.KEYDOWN and not (
-            splash or home or instructions or mode
-        ):
-            key = event.key
-            if key == pygame.K_UP:
-                for i in range(current[0] - 1, -1, -1):
-                    if game.get_cell(i + 1, current[1] + 1).get_color():
-                        current = i, current[1]
-                        break
-            if key == pygame.K_DOWN:
-                for i in range(current[0] + 1, 9):
-                    if game.get_cell(i + 1, current[1] + 1).get_color():
-                        current = i, current[1]
-                        break
-            if key == pygame.K_LEFT:
-                for j in range(current[1] - 1, -1, -1):
-                    if game.get_cell(current[0] + 1, j + 1).get_color():
-                        current = current[0], j
-                        break
-            if key == pygame.K_RIGHT:
-                for j in range(current[1] + 1, 9):
-                    if game.get_cell(current[0] + 1, j + 1).get_color():
-                        current = current[0], j
-                        break
-            i, j = current
-            if game.get_cell(i + 1, j + 1).get_color():
-                highlight = current
 
-        # Get input.
-        if (
-            event.type == pygame.KEYDOWN
-            and highlight
-            and not (splash or home or instructions or mode)
-        ):
-            i, j = highlight
-            key = event.key
-            key_down = False
-            if key == pygame.K_1:
-                game.add_value(i + 1, j + 1, 1)
-                key_down = True
-            if key == pygame.K_2:
-                game.add_value(i + 1, j + 1, 2)
-                key_down = True
-            if key == pygame.K_3:
-                game.add_value(i + 1, j + 1, 3)
-                key_down = True
-            if key == pygame.K_4:
-                game.add_value(i + 1, j + 1, 4)
-                key_down = True
-            if key == pygame.K_5:
-                game.add_value(i + 1, j + 1, 5)
-                key_down = True
-            if key == pygame.K_6:
-                game.add_value(i + 1, j + 1, 6)
-                key_down = True
-            if key == pygame.K_7:
-                game.add_value(i + 1, j + 1, 7)
-                key_down = True
-            if key == pygame.K_8:
-                game.add_value(i + 1, j + 1, 8)
-                key_down = True
-            if key == pygame.K_9:
-                game.add_value(i + 1, j + 1, 9)
-                key_down = True
-            if key == pygame.K_ESCAPE:
-                game.delete_value(i + 1, j + 1)
-                key_down = True
-            if key == pygame.K_DELETE:
-                game.delete_value(i + 1, j + 1)
-                key_down = True
-
-            # Starting Time.
-            if starting_time is None and key_down:
-                starting_time = datetime.datetime.now().strftime("%H:%M:%S")
-                starting_time = datetime.datetime.strptime(starting_time, "%H:%M:%S")
-                end_time = None
-
-    screen.fill(BLACK)
-
-    # Show splash screen.
-    if splash:
-        screen.blit(splash_image, pygame.Rect(0, 0, width, height))
-        pygame.display.flip()
-        splash = False
-        home = True
-        time.sleep(2)
-        continue
-
-    # Show home screen.
-    if home:
-
-        # Title
-        title = title_font.render("Sudoku", True, BLUE)
-        title_rect = title.get_rect()
-        title_rect.center = (width / 2), 100
-        screen.blit(title, title_rect)
-
-        # Sub Title
-        sub_title = medium_font.render("Game with Solver", True, LIGHTBLUE)
-        sub_title_rect = sub_title.get_rect()
-        sub_title_rect.center = (width / 2), 150
-        screen.blit(sub_title, sub_title_rect)
-
-        # Play button
-        play_button_rect = pygame.Rect((width / 2) - 115, (height / 2) + 30, 230, 40)
-        play_button_text = large_font.render("Play Game", True, LIGHTBLUE)
-        play_button_text_rect = play_button_text.get_rect()
-        play_button_text_rect.center = play_button_rect.center
-        screen.blit(play_button_text, play_button_text_rect)
-
-        # Instructions button
-        info_button_rect = pygame.Rect((width / 2) - 115, (height / 2) + 100, 230, 40)
-        info_button_text = large_font.render("Instructions", True, LIGHTBLUE)
-        info_button_text_rect = info_button_text.get_rect()
-        info_button_text_rect.center = info_button_rect.center
-        screen.blit(info_button_text, info_button_text_rect)
-
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if play_button_rect.collidepoint(mouse):
-                home = False
-                mode = True
-            if info_button_rect.collidepoint(mouse):
-                home = False
-                instructions = True
-            time.sleep(0.3)
-        else:
-            mouse = pygame.mouse.get_pos()
-            if play_button_rect.collidepoint(mouse):
-                make_shadow(
-                    "Play Game",
-                    play_button_text_rect.center,
-                    LIGHTBLUE,
-                    BLUE,
-                    large_font,
-                    screen,
-                )
-            elif info_button_rect.collidepoint(mouse):
-                make_shadow(
-                    "Instructions",
-                    info_button_text_rect.center,
-                    LIGHTBLUE,
-                    BLUE,
-                    large_font,
-                    screen,
-                )
+class Runner:
+
+    """The game window and its state, step() runs one iteration of the game loop.
+
+    Nothing happens on import, the window, the puzzle pool and the solver thread
+    are created here and released by quit(). pool_path and cache_path may be None
+    to keep nothing between sessions.
+    """
+
+    def __init__(
+        self,
+        *,
+        fps=FPS,
+        pool_path="puzzle_pool.json",
+        cache_path="solutions.sqlite",
+        pool_size=5,
+    ):
+        # Create game
+        pygame.init()
+        self.fps = fps
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption('Sudoku Solver')
+        self.clock = pygame.time.Clock()
+
+        # Fonts
+        self.small_font = pygame.font.Font(OPEN_SANS, 20)
+        self.medium_font = pygame.font.Font(OPEN_SANS, 26)
+        self.large_font = pygame.font.Font(OPEN_SANS, 36)
+        self.title_font = pygame.font.Font(OPEN_SANS, 70)
+
+        # Load splash image
+        self.splash_image = pygame.image.load(SPLASH_IMAGE)
+        self.splash_image = pygame.transform.scale(self.splash_image, (width, height))
+
+        # Rendered text by (text, color, font)
+        self.glyphs = dict()
+
+        # Mode screen buttons are the rects of their labels
+        self.mode_rects = {
+            name: self.glyph(name, LIGHTBLUE, self.medium_font).get_rect(
+                center=((width / 2), 130 + i * 50)
+            )
+            for i, name in enumerate(MODE_NAMES)
+        }
 
-        pygame.display.flip()
-        continue
-
-    # Show mode screen.
-    if mode:
-
-        # Title
-        title = large_font.render("Select Mode", True, BLUE)
-        title_rect = title.get_rect()
-        title_rect.center = (width / 2), 60
-        screen.blit(title, title_rect)
-
-        # modes
-        y = 80 + 50
-        easy = medium_font.render("Easy", True, LIGHTBLUE)
-        easy_rect = easy.get_rect()
-        easy_rect.center = (width / 2), y + 0 * 50
-        screen.blit(easy, easy_rect)
-
-        medium = medium_font.render("Medium", True, LIGHTBLUE)
-        medium_rect = medium.get_rect()
-        medium_rect.center = (width / 2), y + 1 * 50
-        screen.blit(medium, medium_rect)
-
-        hard = medium_font.render("Hard", True, LIGHTBLUE)
-        hard_rect = hard.get_rect()
-        hard_rect.center = (width / 2), y + 2 * 50
-        screen.blit(hard, hard_rect)
-
-        custom_text = medium_font.render("Custom", True, LIGHTBLUE)
-        custom_rect = custom_text.get_rect()
-        custom_rect.center = (width / 2), y + 3 * 50
-        screen.blit(custom_text, custom_rect)
-
-        # back
-        back = medium_font.render("Back", True, LIGHTBLUE)
-        back_rect = back.get_rect()
-        back_rect.center = (width / 2), y + 4 * 50
-        screen.blit(back, back_rect)
-
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if back_rect.collidepoint(mouse):
-                home = True
-                mode = False
-            if custom_rect.collidepoint(mouse):
-                custom = True
-                mode = False
-                game = Sudoku(mode="custom")
-                game_mode = "Custom"
-            else:
-                if easy_rect.collidepoint(mouse):
-                    game = Sudoku(mode="easy")
-                    game_mode = "Easy"
-                    mode = False
-                elif medium_rect.collidepoint(mouse):
-                    game = Sudoku(mode="medium")
-                    game_mode = "Medium"
-                    mode = False
-                elif hard_rect.collidepoint(mouse):
-                    game = Sudoku(mode="hard")
-                    game_mode = "Hard"
-                    mode = False
-            if game is not None:
-                ai = SudokuAI(game)
-                solve = ai.solve()
-            time.sleep(0.2)
+        # Static game screen background, cells are drawn over copies of its areas
+        self.board_background = pygame.Surface(size)
+        self.board_background.fill(BLACK)
+        for i in range(ROW_COUNT):
+            for j in range(COLUMN_COUNT):
+                house = 3 * (i // 3) + j // 3 + 1
+                color = LIGHTBLUE if house % 2 == 0 else PINK
+                pygame.draw.rect(self.board_background, color, cells[i][j])
+                pygame.draw.rect(self.board_background, WHITE, cells[i][j], 3)
+        draw_house_lines(self.board_background)
+
+        # Pre-generated puzzles for the Generate button, kept between sessions
+        self.pool = PuzzlePool(size=pool_size, path=pool_path)
+        self.pool.start()
+
+        # Packed puzzles, built with "python puzzle_store.py", else puzzle files are read
+        self.store = PuzzleStore(STORE_PATH) if exists(STORE_PATH) else None
+
+        # Solutions of puzzles already played, shared by transformed copies, kept between sessions
+        backing = PersistentSolutionCache(cache_path) if cache_path else None
+        self.cache = SolutionCache(backing=backing)
+
+        # Solving runs in the background, the loop polls the jobs each frame
+        self.solver = SolverService()
+        self.solving = None
+        self.validating = None
+        self.play_when_valid = False
+
+        # Create game and AI agent
+        self.game = None
+        self.ai = None
+        self.solve = None
+
+        self.won = False
+        self.highlight = None
+        self.current = (0, 0)
+        self.valid = None
+        self.game_mode = "Easy"
+
+        # Time variables
+        self.starting_time = None
+        self.end_time = None
+        self.elapsed_time = None
+
+        # Screen variables
+        self.splash = True
+        self.home = False
+        self.instructions = False
+        self.mode = False
+        self.custom = False
+
+        # Ticks at which the splash screen and the validation status are taken down
+        self.splash_end = None
+        self.valid_end = None
+
+        # Position of the last mouse event, for hover shadows
+        self.mouse = (0, 0)
+
+        # The screen is only drawn again after an event or a change of state
+        self.redraw = True
+        self.running = True
+
+        # Game and cell states on the display, only cells whose state changed are drawn
+        self.drawn_game = None
+        self.drawn_cells = [None] * 81
+        self.drawn_panel = None
+
+    def screen_name(self):
+        """Returns the name of the current screen."""
+        if self.splash:
+            return "splash"
+        if self.home:
+            return "home"
+        if self.mode:
+            return "mode"
+        if self.instructions:
+            return "instructions"
+        return "custom" if self.custom else "game"
+
+    def run(self):
+        """Runs the game loop until the window is closed."""
+        while self.step():
+            pass
+
+    def quit(self):
+        """Stops the background work and closes the window."""
+        self.running = False
+        self.solver.shutdown()
+        self.pool.stop()
+        pygame.quit()
+
+    def step(self, timeout=None):
+        """Runs one iteration of the game loop, returns False once the game quit.
+
+        When idle it waits for an event or a timed change, at most timeout
+        milliseconds if given.
+        """
+        # Wait for an event when idle, while solving the frame cap alone paces the loop.
+        if self.redraw or self.solving is not None or self.validating is not None:
+            events = pygame.event.get()
         else:
-            mouse = pygame.mouse.get_pos()
-            if easy_rect.collidepoint(mouse):
-                make_shadow(
-                    "Easy",
-                    easy_rect.center,
-                    LIGHTBLUE,
-                    BLUE,
-                    medium_font,
-                    screen,
-                )
-            elif medium_rect.collidepoint(mouse):
-                make_shadow(
-                    "Medium",
-                    medium_rect.center,
-                    LIGHTBLUE,
-                    BLUE,
-                    medium_font,
-                    screen,
-                )
-            elif hard_rect.collidepoint(mouse):
-                make_shadow(
-                    "Hard",
-                    hard_rect.center,
-                    LIGHTBLUE,
-                    BLUE,
-                    medium_font,
-                    screen,
-                )
-            elif custom_rect.collidepoint(mouse):
-                make_shadow(
-                    "Custom",
-                    custom_rect.center,
-                    LIGHTBLUE,
-                    BLUE,
-                    medium_font,
-                    screen,
-                )
-            elif back_rect.collidepoint(mouse):
-                make_shadow(
-                    "Back",
-                    back_rect.center,
-                    LIGHTBLUE,
-                    BLUE,
-                    medium_font,
-                    screen,
-                )
-
-        pygame.display.flip()
-        continue
-
-    # Show instructions screen.
-    if instructions:
-
-        # Title
-        title = large_font.render("Sudoku Instructions", True, BLUE)
-        title_rect = title.get_rect()
-        title_rect.center = (width / 2), 46
-        screen.blit(title, title_rect)
-
-        # Rules
-        rules = [
-            "Click a cell or use arrow keys to select a cell.",
-            "Each row, column and house must have",
-            "distinct numbers ranging from 1 throuh 9.",
-            "A house is a color coded 3 x 3 block.",
-            "Fill all the cells to complete the puzzle!",
-            'Use "AI move" for hint and "Solve" for solution.',
+            wait = self.wait_timeout()
+            if timeout is not None:
+                wait = max(1, min(wait or timeout, timeout))
+            event = pygame.event.wait(wait)
+            # Timing out means a timed change may be due
+            self.redraw = event.type == pygame.NOEVENT
+            events = [event] + pygame.event.get()
+
+        self.handle_events(events)
+        if not self.running:
+            return False
+        self.update()
+        self.draw()
+        self.clock.tick(self.fps)
+        return True
+
+    def wait_timeout(self):
+        """Returns the milliseconds the idle loop may sleep until a timed change, 0 for none."""
+        now = pygame.time.get_ticks()
+        deadlines = [
+            end - now for end in (self.splash_end, self.valid_end) if end is not None
         ]
-        for i, rule in enumerate(rules):
-            color = LIGHTGREEN if i == 5 else LIGHTBLUE
-            rule_text = small_font.render(rule, True, color)
-            rule_rect = rule_text.get_rect()
-            rule_rect.center = (width / 2), (100 + i * 40)
-            screen.blit(rule_text, rule_rect)
-
-        # back
-        button_rect = pygame.Rect((width / 2) - 40, height - 66, 80, 36)
-        button_text = medium_font.render("Back", True, BLACK)
-        text_rect = button_text.get_rect()
-        text_rect.center = button_rect.center
-        pygame.draw.rect(screen, WHITE, button_rect)
-        screen.blit(button_text, text_rect)
-
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if button_rect.collidepoint(mouse):
-                instructions = False
-                home = True
-                time.sleep(0.3)
-        else:
-            mouse = pygame.mouse.get_pos()
-            if button_rect.collidepoint(mouse):
-                make_shadow(
-                    "Back",
-                    text_rect.center,
-                    BLUE,
-                    LIGHTBLUE,
-                    medium_font,
-                    screen,
-                )
+        if (
+            self.game is not None
+            and self.starting_time is not None
+            and self.end_time is None
+        ):
+            # The elapsed time shown changes on the next second
+            deadlines.append(1000 - datetime.datetime.now().microsecond // 1000)
+        return max(1, min(deadlines)) if deadlines else 0
 
-        pygame.display.flip()
-        continue
-
-    # draw board
-    cells = []
-    for i in range(ROW_COUNT):
-        row = []
-        for j in range(COLUMN_COUNT):
-
-            rect = pygame.Rect(
-                board_origin[0] + 2 * (j // 3) + j * cell_size,
-                board_origin[1] + 2 * (i // 3) + i * cell_size,
-                cell_size,
-                cell_size,
-            )
+    def handle_events(self, events):
+        """Handles input events."""
+        for event in events:
 
-            r = 1 if i + 1 in [1, 2, 3] else 2 if i + 1 in [4, 5, 6] else 3
-            c = 1 if j + 1 in [1, 2, 3] else 2 if j + 1 in [4, 5, 6] else 3
-            house = 3 * (r - 1) + c
-
-            color = LIGHTBLUE if house % 2 == 0 else PINK
-            pygame.draw.rect(screen, color, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            cell = game.get_cell(i + 1, j + 1)
-            cell_value = str(cell.get_value()) if cell.get_value() != 0 else ""
-            cell_color = (
-                BLUE
-                if cell.get_color() == 1
-                else BLACK
-                if cell.get_color() == 0
-                else PURPLE
-            )
+            if event.type != pygame.NOEVENT:
+                self.redraw = True
 
-            text = small_font.render(cell_value, True, cell_color)
-            text_rect = text.get_rect()
-            text_rect.center = rect.center
-            screen.blit(text, text_rect)
-
-            # Draw red box if it is a conflit
-            if cell.get_conflicts_count():
-                conflict_rect = pygame.Rect(
-                    board_origin[0] + 1 + 2 * (j // 3) + j * cell_size,
-                    board_origin[1] + 1 + 2 * (i // 3) + i * cell_size,
-                    cell_size - 3,
-                    cell_size - 3,
-                )
-                pygame.draw.rect(screen, RED, conflict_rect, 2)
+            # The window lost its content, draw it all again.
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.drawn_game = None
 
-            row.append(rect)
-        cells.append(row)
+            # Quit event.
+            if event.type == pygame.QUIT:
+                self.quit()
+                return
 
-    # Highlighting the current cell
-    if highlight and not (splash or home or instructions or mode):
-        i, j = highlight
-        pygame.draw.rect(screen, SPRINGGREEN, cells[i][j], 3)
+            if event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN):
+                self.mouse = event.pos
 
-    # Show custom screen.
-    if custom:
-        # Draw Generate button.
-        generate_button = pygame.Rect(
-            (2 / 3) * width + BOARD_PADDING,
-            (1 / 3) * height - 110,
-            (width / 3) - 2 * BOARD_PADDING,
-            40,
-        )
-        button_text = medium_font.render("Generate", True, BLACK)
-        button_rect = button_text.get_rect()
-        button_rect.center = generate_button.center
-        pygame.draw.rect(screen, WHITE, generate_button)
-        screen.blit(button_text, button_rect)
-
-        # Draw Validate button.
-        valid_button = pygame.Rect(
-            (2 / 3) * width + BOARD_PADDING,
-            (1 / 3) * height - 30,
-            (width / 3) - 2 * BOARD_PADDING,
-            48,
-        )
-        valid_text = "Valid!" if valid else "Validate" if valid is None else "Invalid"
-        valid_color = SPRINGGREEN if valid else WHITE if valid is None else RED
-        button_text = medium_font.render(valid_text, True, BLACK)
-        button_rect = button_text.get_rect()
-        button_rect.center = valid_button.center
-        pygame.draw.rect(screen, valid_color, valid_button)
-        screen.blit(button_text, button_rect)
-
-        # Draw Play button.
-        play_button = pygame.Rect(
-            (2 / 3) * width + BOARD_PADDING,
-            (1 / 3) * height + 40,
-            (width / 3) - 2 * BOARD_PADDING,
-            48,
-        )
-        button_text = medium_font.render("Play", True, BLACK)
-        button_rect = button_text.get_rect()
-        button_rect.center = play_button.center
-        pygame.draw.rect(screen, WHITE, play_button)
-        screen.blit(button_text, button_rect)
-
-    else:
-        # Time
-        if starting_time is None:
-            elapsed_time = "0:00:00"
-        elif end_time is None:
-            curr_time = datetime.datetime.now().strftime("%H:%M:%S")
-            curr_time = datetime.datetime.strptime(curr_time, "%H:%M:%S")
-            elapsed_time = str(curr_time - starting_time)
-        time_button = pygame.Rect(
-            (2 / 3) * width + BOARD_PADDING,
-            (1 / 3) * height - 110,
-            (width / 3) - 2 * BOARD_PADDING,
-            40,
-        )
-        button_text = medium_font.render(elapsed_time, True, BLUE)
-        button_rect = button_text.get_rect()
-        button_rect.center = time_button.center
-        pygame.draw.rect(screen, WHITE, time_button)
-        screen.blit(button_text, button_rect)
-
-        # Render game_mode
-        game_mode_text = small_font.render(game_mode, True, SPRINGGREEN)
-        game_mode_text_rect = game_mode_text.get_rect()
-        game_mode_text_rect.center = (5 / 6) * width, (1 / 3) * height - 110 + 50
-        screen.blit(game_mode_text, game_mode_text_rect)
-
-        # Draw AI hint button
-        ai_button = pygame.Rect(
-            (2 / 3) * width + BOARD_PADDING,
-            (1 / 3) * height - 30,
-            (width / 3) - 2 * BOARD_PADDING,
-            48,
-        )
-        button_text = medium_font.render("AI Move", True, BLACK)
-        button_rect = button_text.get_rect()
-        button_rect.center = ai_button.center
-        pygame.draw.rect(screen, WHITE, ai_button)
-        screen.blit(button_text, button_rect)
-
-        # Draw AI solve button
-        solve_button = pygame.Rect(
-            (2 / 3) * width + BOARD_PADDING,
-            (1 / 3) * height + 40,
-            (width / 3) - 2 * BOARD_PADDING,
-            48,
-        )
-        button_text = medium_font.render("Solve", True, BLACK)
-        button_rect = button_text.get_rect()
-        button_rect.center = solve_button.center
-        pygame.draw.rect(screen, WHITE, solve_button)
-        screen.blit(button_text, button_rect)
-
-        # Draw won message
-        if game.check_goal_state():
-            won = True
-            won_button = pygame.Rect(
-                (2 / 3) * width + BOARD_PADDING,
-                (1 / 3) * height - 30,
-                (width / 3) - 2 * BOARD_PADDING,
-                48,
-            )
-            button_text = medium_font.render("You Won!", True, BLACK)
-            button_rect = button_text.get_rect()
-            button_rect.center = won_button.center
-            pygame.draw.rect(screen, SPRINGGREEN, won_button)
-            screen.blit(button_text, button_rect)
-            end_time = elapsed_time
-        else:
-            won = False
+            if event.type == pygame.KEYDOWN and not (
+                self.splash or self.home or self.instructions or self.mode
+            ):
+                self.key_down(event)
 
-    # Draw Reset button
-    reset_button = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING,
-        (1 / 3) * height + 130,
-        (width / 3) - 2 * BOARD_PADDING,
-        48,
-    )
-    button_text = medium_font.render("Reset", True, BLACK)
-    button_rect = button_text.get_rect()
-    button_rect.center = reset_button.center
-    pygame.draw.rect(screen, WHITE, reset_button)
-    screen.blit(button_text, button_rect)
-
-    # Draw Home button
-    home_button = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING,
-        (1 / 3) * height + 200,
-        (width / 3) - 2 * BOARD_PADDING,
-        48,
-    )
-    button_text = medium_font.render("Home", True, BLACK)
-    button_rect = button_text.get_rect()
-    button_rect.center = home_button.center
-    pygame.draw.rect(screen, WHITE, home_button)
-    screen.blit(button_text, button_rect)
-
-    # Draw lines in between houses
-    pygame.draw.line(
-        screen,
-        BLACK,
-        (
-            board_origin[0] + 3 * cell_size,
-            board_origin[1] + 0 * cell_size,
-        ),
-        (
-            board_origin[0] + 3 * cell_size,
-            board_origin[1] + 9 * cell_size,
-        ),
-        2,
-    )
-    pygame.draw.line(
-        screen,
-        BLACK,
-        (
-            2 + board_origin[0] + 6 * cell_size,
-            board_origin[1] + 0 * cell_size,
-        ),
-        (
-            2 + board_origin[0] + 6 * cell_size,
-            board_origin[1] + 9 * cell_size,
-        ),
-        2,
-    )
-    pygame.draw.line(
-        screen,
-        BLACK,
-        (
-            board_origin[0] + 0 * cell_size,
-            board_origin[1] + 3 * cell_size,
-        ),
-        (
-            board_origin[0] + 9 * cell_size,
-            board_origin[1] + 3 * cell_size,
-        ),
-        2,
-    )
-    pygame.draw.line(
-        screen,
-        BLACK,
-        (
-            board_origin[0] + 0 * cell_size,
-            2 + board_origin[1] + 6 * cell_size,
-        ),
-        (
-            board_origin[0] + 9 * cell_size,
-            2 + board_origin[1] + 6 * cell_size,
-        ),
-        2,
-    )
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.click(event.pos)
 
-    # show validation status.
-    if valid is not None:
-        pygame.display.flip()
-        time.sleep(1)
-        valid = None
+    def key_down(self, event):
+        """Handles a key pressed on the game screen."""
+        game = self.game
 
-    left, _, _ = pygame.mouse.get_pressed()
-    if left == 1:
+        # Navigation using arrow keys.
+        key = event.key
+        current = self.current
+        if key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+            game.undo()
+        if key == pygame.K_y and event.mod & pygame.KMOD_CTRL:
+            game.redo()
+        if key == pygame.K_UP:
+            for i in range(current[0] - 1, -1, -1):
+                if game.get_cell(i + 1, current[1] + 1).get_color():
+                    current = i, current[1]
+                    break
+        if key == pygame.K_DOWN:
+            for i in range(current[0] + 1, 9):
+                if game.get_cell(i + 1, current[1] + 1).get_color():
+                    current = i, current[1]
+                    break
+        if key == pygame.K_LEFT:
+            for j in range(current[1] - 1, -1, -1):
+                if game.get_cell(current[0] + 1, j + 1).get_color():
+                    current = current[0], j
+                    break
+        if key == pygame.K_RIGHT:
+            for j in range(current[1] + 1, 9):
+                if game.get_cell(current[0] + 1, j + 1).get_color():
+                    current = current[0], j
+                    break
+        self.current = current
+        i, j = current
+        if game.get_cell(i + 1, j + 1).get_color():
+            self.highlight = current
 
-        mouse = pygame.mouse.get_pos()
-        highlight = None
+        # Get input.
+        if not self.highlight:
+            return
+        i, j = self.highlight
+        key_down = False
+        if pygame.K_1 <= key <= pygame.K_9:
+            game.add_value(i + 1, j + 1, key - pygame.K_0)
+            key_down = True
+        if key == pygame.K_ESCAPE:
+            game.delete_value(i + 1, j + 1)
+            key_down = True
+        if key == pygame.K_DELETE:
+            game.delete_value(i + 1, j + 1)
+            key_down = True
+
+        # Starting Time.
+        if self.starting_time is None and key_down:
+            starting_time = datetime.datetime.now().strftime("%H:%M:%S")
+            self.starting_time = datetime.datetime.strptime(starting_time, "%H:%M:%S")
+            self.end_time = None
+
+    def click(self, mouse):
+        """Handles a left click at mouse."""
+        if self.splash:
+            return
+
+        # Home screen clicks.
+        if self.home:
+            if play_button_rect.collidepoint(mouse):
+                self.home = False
+                self.mode = True
+            elif info_button_rect.collidepoint(mouse):
+                self.home = False
+                self.instructions = True
+
+        # Mode screen clicks.
+        elif self.mode:
+            if self.mode_rects["Back"].collidepoint(mouse):
+                self.home = True
+                self.mode = False
+            elif self.mode_rects["Custom"].collidepoint(mouse):
+                self.custom = True
+                self.mode = False
+                self.game = Sudoku(mode="custom")
+                self.game_mode = "Custom"
+            else:
+                for name in ("Easy", "Medium", "Hard"):
+                    if self.mode_rects[name].collidepoint(mouse):
+                        self.game = Sudoku(mode=name.lower(), store=self.store)
+                        self.game_mode = name
+                        self.mode = False
+                        self.ai = SudokuAI(self.game, cache=self.cache)
+                        self.solve = None
+                        self.solving = self.solver.submit(self.ai)
+
+        # Instructions screen clicks.
+        elif self.instructions:
+            if back_button_rect.collidepoint(mouse):
+                self.instructions = False
+                self.home = True
+
+        # Game screen clicks.
+        else:
+            self.game_click(mouse)
+
+    def game_click(self, mouse):
+        """Handles a left click on the game screen."""
+        self.highlight = None
 
         if reset_button.collidepoint(mouse):
-            game.reset()
-            starting_time = None
-            current = (0, 0)
-            time.sleep(0.2)
+            if self.validating is not None:
+                self.validating.cancel()
+                self.validating = None
+            self.game.reset()
+            self.starting_time = None
+            self.current = (0, 0)
         elif home_button.collidepoint(mouse):
-            home = True
-            game.reset()
-            starting_time = None
-            current = (0, 0)
-            time.sleep(0.2)
+            self.home = True
+            self.solver.cancel_all()
+            self.solving = self.validating = None
+            self.game.reset()
+            self.starting_time = None
+            self.current = (0, 0)
+            return
 
-        if custom:
+        if self.custom:
 
             # Generate puzzle.
             if generate_button.collidepoint(mouse):
+                if self.validating is not None:
+                    self.validating.cancel()
+                    self.validating = None
                 gen_mode = choice(("Easy", "Medium", "Hard"))
-                game_mode = "Custom " + gen_mode
-                num_var = (
-                    48 if gen_mode == "Easy" else 36 if gen_mode == "Medium" else 21
-                )
-                game = Sudoku(mode="custom")
-                game.add_value(1, 1, choice(range(1, 10)), 0)
-                game.add_value(2, 8, choice(range(1, 10)), 0)
-                game.add_value(8, 2, choice(range(1, 10)), 0)
-                game.add_value(9, 9, choice(range(1, 10)), 0)
-                game.add_value(5, 5, choice(range(1, 10)), 0)
-                ai = SudokuAI(game)
-                solve = ai.solve()
-                stack_1 = [(i, j) for i in range(1, 4) for j in range(1, 10)]
-                stack_2 = [(i, j) for i in range(4, 7) for j in range(1, 10)]
-                stack_3 = [(i, j) for i in range(7, 10) for j in range(1, 10)]
-                stack_1 = sample(stack_1, num_var // 3)
-                stack_2 = sample(stack_2, num_var // 3)
-                stack_3 = sample(stack_3, num_var // 3)
-                stack = stack_1 + stack_2 + stack_3
-                puzzle = {loc: solve[loc] for loc in stack}
-                game = Sudoku(mode="custom", puzzle=puzzle)
+                self.game_mode = "Custom " + gen_mode
+                puzzle = self.pool.pop(gen_mode.lower())
+                self.game = Sudoku(mode="custom", puzzle=puzzle)
 
             # Validate puzzle.
+            # The game is created once validation finishes.
             if valid_button.collidepoint(mouse) or play_button.collidepoint(mouse):
+                if self.validating is not None:
+                    self.validating.cancel()
                 new_game = Sudoku(mode="custom")
-                cells_custom = game.get_cells()
+                cells_custom = self.game.get_cells()
                 for cell in cells_custom:
                     if cells_custom[cell].value:
                         value = cells_custom[cell].value
                         x = cells_custom[cell].x
                         y = cells_custom[cell].y
                         new_game.add_value(x, y, value, 0)
-                ai = SudokuAI(new_game)
-                solve = ai.solve()
-                valid = True if solve else False
-                time.sleep(0.2)
-
-            # Create game.
-            if play_button.collidepoint(mouse) and valid:
-                custom = False
-                starting_time = None
-                puzzle = {}
-                cells_custom = game.get_cells()
-                for cell in cells_custom:
-                    if cells_custom[cell].value:
-                        puzzle[cell] = cells_custom[cell].value
-                game = Sudoku(mode="custom", puzzle=puzzle)
+                self.ai = SudokuAI(new_game, engine="bitset")
+                self.validating = self.solver.submit(self.ai, limit=2)
+                self.play_when_valid = play_button.collidepoint(mouse)
 
         else:
 
             # Display solution.
-            if solve_button.collidepoint(mouse):
-                for i, j in solve.items():
-                    game.add_value(*i, j, 2)
-                time.sleep(0.2)
+            if solve_button.collidepoint(mouse) and self.solve is not None:
+                self.game.add_values(self.solve, 2)
 
             # Display hint.
-            elif ai_button.collidepoint(mouse) and not won:
-                hint_var, hint = ai.hint()
-                game.add_value(*hint_var, hint, 2)
-                time.sleep(0.4)
+            elif (
+                ai_button.collidepoint(mouse)
+                and not self.won
+                and self.solve is not None
+            ):
+                hint_var, hint = self.ai.hint()
+                self.game.add_value(*hint_var, hint, 2)
 
         # Get highlight.
         for i in range(ROW_COUNT):
             for j in range(COLUMN_COUNT):
                 if (
                     cells[i][j].collidepoint(mouse)
-                    and game.get_cell(i + 1, j + 1).get_color()
+                    and self.game.get_cell(i + 1, j + 1).get_color()
                 ):
-                    highlight = (i, j)
-                    current = highlight
+                    self.highlight = (i, j)
+                    self.current = self.highlight
                     break
 
-    else:
-        
-        mouse = pygame.mouse.get_pos()
-        if reset_button.collidepoint(mouse):
-            make_shadow(
-                "Reset", reset_button.center, BLUE, LIGHTBLUE, medium_font, screen
+    def update(self):
+        """Collects finished solver jobs and takes down timed screens."""
+        if self.solving is not None:
+            self.redraw = True
+            if self.solving.done():
+                self.solve = self.solving.result()
+                self.solving = None
+        if self.validating is not None:
+            self.redraw = True
+            if self.validating.done():
+                self.valid = self.validating.result() == 1
+                self.valid_end = pygame.time.get_ticks() + 1000
+                self.solve = self.ai.solution
+                self.validating = None
+                if self.play_when_valid and self.valid:
+                    self.custom = False
+                    self.starting_time = None
+                    puzzle = {}
+                    cells_custom = self.game.get_cells()
+                    for cell in cells_custom:
+                        if cells_custom[cell].value:
+                            puzzle[cell] = cells_custom[cell].value
+                    self.game = Sudoku(mode="custom", puzzle=puzzle)
+                self.play_when_valid = False
+
+        now = pygame.time.get_ticks()
+        if self.splash_end is not None and now >= self.splash_end:
+            self.splash = False
+            self.home = True
+            self.splash_end = None
+            self.redraw = True
+        if self.valid_end is not None and now >= self.valid_end:
+            self.valid = None
+            self.valid_end = None
+            self.redraw = True
+
+    def glyph(self, text, color, font):
+        """Returns the text rendered with font and color, rendering it only on first use."""
+        key = (text, color, font)
+        surface = self.glyphs.get(key)
+        if surface is None:
+            surface = self.glyphs[key] = font.render(text, True, color)
+        return surface
+
+    def glyph_blit(self, text, color, font, center):
+        """Draws the cached text centered at center."""
+        text = self.glyph(text, color, font)
+        self.screen.blit(text, text.get_rect(center=center))
+
+    def make_shadow(self, text, center, color, shadow_color, font):
+        """Make shadow effect for a given text."""
+
+        self.glyph_blit(text, shadow_color, font, (center[0] + 1, center[1] + 1))
+        self.glyph_blit(text, color, font, center)
+        return
+
+    def draw_button(self, rect, text, color=WHITE):
+        """Draws a filled button with its centered label."""
+        pygame.draw.rect(self.screen, color, rect)
+        self.glyph_blit(text, BLACK, self.medium_font, rect.center)
+
+    def draw(self):
+        """Draws the current screen if anything changed, returns True if a frame was drawn."""
+        if not self.redraw:
+            return False
+        self.redraw = False
+        screen = self.screen
+        mouse = self.mouse
+
+        # Show splash screen.
+        if self.splash:
+            screen.blit(self.splash_image, pygame.Rect(0, 0, width, height))
+            if self.splash_end is None:
+                self.splash_end = pygame.time.get_ticks() + 2000
+
+        # Show home screen.
+        elif self.home:
+            screen.fill(BLACK)
+
+            # Title
+            self.glyph_blit("Sudoku", BLUE, self.title_font, ((width / 2), 100))
+
+            # Sub Title
+            self.glyph_blit(
+                "Game with Solver", LIGHTBLUE, self.medium_font, ((width / 2), 150)
             )
-        elif home_button.collidepoint(mouse):
-            make_shadow(
-                "Home", home_button.center, BLUE, LIGHTBLUE, medium_font, screen
+
+            # Play and Instructions buttons
+            for text, rect in (
+                ("Play Game", play_button_rect),
+                ("Instructions", info_button_rect),
+            ):
+                self.glyph_blit(text, LIGHTBLUE, self.large_font, rect.center)
+                if rect.collidepoint(mouse):
+                    self.make_shadow(text, rect.center, LIGHTBLUE, BLUE, self.large_font)
+
+        # Show mode screen.
+        elif self.mode:
+            screen.fill(BLACK)
+
+            # Title
+            self.glyph_blit("Select Mode", BLUE, self.large_font, ((width / 2), 60))
+
+            # modes
+            for name, rect in self.mode_rects.items():
+                self.glyph_blit(name, LIGHTBLUE, self.medium_font, rect.center)
+                if rect.collidepoint(mouse):
+                    self.make_shadow(name, rect.center, LIGHTBLUE, BLUE, self.medium_font)
+
+        # Show instructions screen.
+        elif self.instructions:
+            screen.fill(BLACK)
+
+            # Title
+            self.glyph_blit(
+                "Sudoku Instructions", BLUE, self.large_font, ((width / 2), 46)
             )
 
-        if custom:
-            if valid_button.collidepoint(mouse):
-                make_shadow(
-                    "Validate",
-                    valid_button.center,
-                    BLUE,
-                    LIGHTBLUE,
-                    medium_font,
-                    screen,
+            # Rules
+            rules = [
+                "Click a cell or use arrow keys to select a cell.",
+                "Each row, column and house must have",
+                "distinct numbers ranging from 1 throuh 9.",
+                "A house is a color coded 3 x 3 block.",
+                "Fill all the cells to complete the puzzle!",
+                'Use "AI move" for hint and "Solve" for solution.',
+            ]
+            for i, rule in enumerate(rules):
+                color = LIGHTGREEN if i == 5 else LIGHTBLUE
+                self.glyph_blit(
+                    rule, color, self.small_font, ((width / 2), (100 + i * 40))
                 )
-            elif play_button.collidepoint(mouse):
-                make_shadow(
-                    "Play", play_button.center, BLUE, LIGHTBLUE, medium_font, screen
+
+            # back
+            self.draw_button(back_button_rect, "Back")
+            if back_button_rect.collidepoint(mouse):
+                self.make_shadow(
+                    "Back", back_button_rect.center, BLUE, LIGHTBLUE, self.medium_font
                 )
-            elif generate_button.collidepoint(mouse):
-                make_shadow(
-                    "Generate",
-                    generate_button.center,
-                    BLUE,
-                    LIGHTBLUE,
-                    medium_font,
-                    screen,
+
+        # Show game screen, only the cells and side panel that changed are drawn again.
+        else:
+            self.draw_game()
+            return True
+
+        self.drawn_game = None
+        pygame.display.flip()
+        return True
+
+    def draw_game(self):
+        """Draws the cells and side panel of the game screen that changed since the last frame."""
+        screen = self.screen
+        game = self.game
+        full = self.drawn_game is not game
+        if full:
+            screen.blit(self.board_background, (0, 0))
+            self.drawn_game = game
+            self.drawn_cells = [None] * 81
+            self.drawn_panel = None
+        dirty = []
+
+        # draw board
+        for i in range(ROW_COUNT):
+            for j in range(COLUMN_COUNT):
+                cell = game.get_cell(i + 1, j + 1)
+                state = (
+                    cell.get_value(),
+                    cell.get_color(),
+                    cell.get_conflicts_count() > 0,
+                    self.highlight == (i, j),
                 )
+                if self.drawn_cells[9 * i + j] == state:
+                    continue
+                self.drawn_cells[9 * i + j] = state
+                value, color, conflict, highlighted = state
+                rect = cells[i][j]
+                screen.blit(self.board_background, rect, rect)
+                if value:
+                    self.glyph_blit(
+                        str(value), DIGIT_COLORS[color], self.small_font, rect.center
+                    )
+
+                # Draw red box if it is a conflit
+                if conflict:
+                    conflict_rect = pygame.Rect(
+                        rect.x + 1, rect.y + 1, cell_size - 3, cell_size - 3
+                    )
+                    pygame.draw.rect(screen, RED, conflict_rect, 2)
+
+                # Highlighting the current cell
+                if highlighted:
+                    pygame.draw.rect(screen, SPRINGGREEN, rect, 3)
+                dirty.append(rect)
+        if dirty:
+            draw_house_lines(screen)
+
+        # Side panel
+        valid = self.valid
+        if self.custom:
+            valid_text = "Valid!" if valid else "Validate" if valid is None else "Invalid"
+            if self.validating is not None:
+                valid_text = f"Checking {self.validating.nodes}"
+            valid_color = SPRINGGREEN if valid else WHITE if valid is None else RED
+            panel = (self.custom, valid_text, valid_color)
         else:
-            if solve_button.collidepoint(mouse):
-                make_shadow(
-                    "Solve", solve_button.center, BLUE, LIGHTBLUE, medium_font, screen
+            # Time
+            if self.starting_time is None:
+                self.elapsed_time = "0:00:00"
+            elif self.end_time is None:
+                curr_time = datetime.datetime.now().strftime("%H:%M:%S")
+                curr_time = datetime.datetime.strptime(curr_time, "%H:%M:%S")
+                self.elapsed_time = str(curr_time - self.starting_time)
+            if self.solving is None:
+                ai_text = "AI Move"
+            else:
+                ai_text = f"Solving {self.solving.nodes}"
+            self.won = game.check_goal_state()
+            if self.won:
+                self.end_time = self.elapsed_time
+            panel = (self.custom, self.elapsed_time, self.game_mode, ai_text, self.won)
+        hover, hover_label = next(
+            (
+                (rect, label)
+                for rect, label in panel_buttons(self.custom)
+                if rect.collidepoint(self.mouse)
+            ),
+            (None, None),
+        )
+        panel += (hover_label,)
+
+        if panel != self.drawn_panel:
+            self.drawn_panel = panel
+            screen.blit(self.board_background, panel_rect, panel_rect)
+
+            # Show custom screen.
+            if self.custom:
+                # Draw Generate, Validate and Play buttons.
+                self.draw_button(generate_button, "Generate")
+                self.draw_button(valid_button, valid_text, valid_color)
+                self.draw_button(play_button, "Play")
+
+            else:
+                # Time, changing text is rendered without the glyph cache.
+                button_text = self.medium_font.render(self.elapsed_time, True, BLUE)
+                button_rect = button_text.get_rect()
+                button_rect.center = time_button.center
+                pygame.draw.rect(screen, WHITE, time_button)
+                screen.blit(button_text, button_rect)
+
+                # Render game_mode
+                self.glyph_blit(
+                    self.game_mode,
+                    SPRINGGREEN,
+                    self.small_font,
+                    ((5 / 6) * width, (1 / 3) * height - 110 + 50),
                 )
-            elif ai_button.collidepoint(mouse) and not won:
-                make_shadow(
-                    "AI Move", ai_button.center, BLUE, LIGHTBLUE, medium_font, screen
+
+                # Draw AI hint button, won message in its place
+                if self.won:
+                    self.draw_button(won_button, "You Won!", SPRINGGREEN)
+                elif self.solving is None:
+                    self.draw_button(ai_button, ai_text)
+                else:
+                    pygame.draw.rect(screen, WHITE, ai_button)
+                    button_text = self.medium_font.render(ai_text, True, BLACK)
+                    screen.blit(button_text, button_text.get_rect(center=ai_button.center))
+
+                # Draw AI solve button
+                self.draw_button(solve_button, "Solve")
+
+            # Draw Reset and Home buttons
+            self.draw_button(reset_button, "Reset")
+            self.draw_button(home_button, "Home")
+
+            # Hover shadows
+            shadowed = hover is not None and not (
+                self.custom and hover == valid_button and self.validating is not None
+            )
+            shadowed = shadowed and not (
+                not self.custom
+                and hover == ai_button
+                and (self.won or self.solving is not None)
+            )
+            if shadowed:
+                self.make_shadow(
+                    hover_label,
+                    hover.center,
+                    BLUE,
+                    LIGHTBLUE,
+                    self.medium_font,
                 )
+            dirty.append(panel_rect)
+
+        if full:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+
+
+def main():
+    """Opens the game window and runs it until closed."""
+    Runner().run()
+    sys.exit()
+
 
-    pygame.display.flip()
+if __name__ == "__main__":
+    main()
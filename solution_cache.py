@@ -0,0 +1,266 @@
+""" This module contains solution caches keyed by the canonical form of puzzles. """
+
+import json
+import sqlite3
+from collections import OrderedDict
+from itertools import permutations, product
+
+from sudoku import CELLS, format_line, parse_line
+
+# Partial transforms tried per row before giving up on canonicalising a puzzle.
+MAX_STATES = 20000
+
+# Orders of the three lines of a band (or stack) and of the three bands (or stacks).
+ORDERS = tuple(permutations(range(3)))
+
+
+def best_column_orders(row):
+    """Returns the column orders, stacks kept together, putting the row's blanks first."""
+    stacks = []
+    for stack in range(3):
+        orders = [tuple(3 * stack + i for i in order) for order in ORDERS]
+        keys = {order: tuple(row[col] != 0 for col in order) for order in orders}
+        best = min(keys.values())
+        stacks.append((best, [order for order in orders if keys[order] == best]))
+    keys = {order: tuple(stacks[s][0] for s in order) for order in ORDERS}
+    best = min(keys.values())
+    columns = []
+    for order in ORDERS:
+        if keys[order] == best:
+            for parts in product(*(stacks[s][1] for s in order)):
+                columns.append(parts[0] + parts[1] + parts[2])
+    return columns
+
+
+def relabel(row, columns, labels):
+    """Returns the row read in column order with digits renamed by first appearance.
+
+    New digits are added to a copy of labels, which is returned with the row.
+    """
+    result = []
+    for col in columns:
+        value = row[col]
+        if value:
+            label = labels.get(value)
+            if label is None:
+                labels = dict(labels)
+                label = labels[value] = len(labels) + 1
+            result.append(label)
+        else:
+            result.append(0)
+    return tuple(result), labels
+
+
+def next_rows(rows):
+    """Returns the rows that can follow the chosen rows, keeping bands together."""
+    if len(rows) % 3:
+        band = rows[-1] // 3
+        return [row for row in range(3 * band, 3 * band + 3) if row not in rows]
+    used = {row // 3 for row in rows}
+    return [row for row in range(9) if row // 3 not in used]
+
+
+def canonical_form(puzzle):
+    """Returns the canonical key of a {(row, col): value} puzzle and the transform reaching it.
+
+    The key is the lexicographically smallest 81-tuple (0 for blanks) over transposition,
+    band and stack swaps, row and column swaps within them and digit relabeling, so all
+    puzzles of one symmetry class share it. The transform is (transposed, rows, columns,
+    labels): canonical cell (i, j) comes from cell (rows[i] + 1, columns[j] + 1) of the
+    possibly transposed puzzle, and labels maps its digits to canonical ones.
+    Returns (None, None) for puzzles too symmetric (nearly empty) to canonicalise cheaply.
+    """
+    grid = [[puzzle.get((row, col), 0) for col in range(1, 10)] for row in range(1, 10)]
+    grids = (grid, [list(col) for col in zip(*grid)])
+
+    # Partial transforms (transposed, rows, columns, labels) reaching the smallest prefix.
+    # For the first row only the blank pattern matters, digits are labelled in order.
+    states, best = [], None
+    for transposed, rows in enumerate(grids):
+        for row in range(9):
+            for columns in best_column_orders(rows[row]):
+                key, labels = relabel(rows[row], columns, {})
+                if best is None or key < best:
+                    states, best = [], key
+                if key == best:
+                    states.append((transposed, (row,), columns, labels))
+    prefix = best
+
+    for _ in range(8):
+        if len(states) > MAX_STATES:
+            return None, None
+        reached, best = [], None
+        for transposed, chosen, columns, labels in states:
+            rows = grids[transposed]
+            for row in next_rows(chosen):
+                key, new_labels = relabel(rows[row], columns, labels)
+                if best is None or key < best:
+                    best = key
+                elif key > best:
+                    continue
+                reached.append((key, (transposed, chosen + (row,), columns, new_labels)))
+        states = [state for key, state in reached if key == best]
+        prefix += best
+
+    return prefix, states[0]
+
+
+def to_canonical(solution, transform):
+    """Maps a solution of the puzzle into the canonical frame of its transform."""
+    transposed, rows, columns, labels = transform
+    labels = dict(labels)
+    for value in range(1, 10):
+        if value not in labels:
+            labels[value] = len(labels) + 1
+    canonical = []
+    for i, j in CELLS:
+        row, col = rows[i - 1] + 1, columns[j - 1] + 1
+        cell = (col, row) if transposed else (row, col)
+        canonical.append(labels[solution[cell]])
+    return tuple(canonical)
+
+
+def from_canonical(canonical, transform):
+    """Maps a canonical solution back onto the puzzle of the transform."""
+    transposed, rows, columns, labels = transform
+    values = {label: value for value, label in labels.items()}
+    unused = [value for value in range(1, 10) if value not in labels]
+    for label in range(len(labels) + 1, 10):
+        values[label] = unused[label - len(labels) - 1]
+    solution = dict()
+    for (i, j), label in zip(CELLS, canonical):
+        row, col = rows[i - 1] + 1, columns[j - 1] + 1
+        cell = (col, row) if transposed else (row, col)
+        solution[cell] = values[label]
+    return solution
+
+
+class SolutionCache:
+
+    """LRU cache of solutions keyed by canonical form, transformed copies of a puzzle share an entry.
+
+    Misses are looked up in the optional backing cache and puts are written through to it.
+    """
+
+    def __init__(self, maxsize=1024, backing=None):
+        self.maxsize = maxsize
+        self.backing = backing
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, puzzle):
+        """Returns the cached solution of the {(row, col): value} puzzle, None on a miss."""
+        key, transform = canonical_form(puzzle)
+        canonical = self.entries.get(key) if key is not None else None
+        if canonical is None:
+            solution = self.backing.get(puzzle) if self.backing is not None else None
+            if solution is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.store(key, transform, solution)
+            return solution
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return from_canonical(canonical, transform)
+
+    def put(self, puzzle, solution, stats=None):
+        """Caches the solution of the puzzle, evicting the least recently used entry when full."""
+        if self.backing is not None:
+            self.backing.put(puzzle, solution, stats)
+        self.store(*canonical_form(puzzle), solution)
+
+    def store(self, key, transform, solution):
+        """Adds the solution under its canonical key."""
+        if key is None:
+            return
+        self.entries[key] = to_canonical(solution, transform)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+class PersistentSolutionCache:
+
+    """SQLite cache of solutions and solver stats keyed by the exact puzzle, kept across restarts.
+
+    Holds at most maxsize puzzles, the least recently used ones are evicted first.
+    """
+
+    def __init__(self, path, maxsize=100000):
+        self.maxsize = maxsize
+        # The game uses the cache from its solver thread
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS solutions (
+                puzzle TEXT PRIMARY KEY,
+                solution TEXT NOT NULL,
+                stats TEXT,
+                used INTEGER NOT NULL
+            )"""
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)"
+        )
+        self.connection.commit()
+        self.clock = self.connection.execute(
+            "SELECT COALESCE(MAX(used), 0) FROM solutions"
+        ).fetchone()[0]
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self):
+        """Closes the database."""
+        self.connection.close()
+
+    def tick(self):
+        """Returns the next use stamp."""
+        self.clock += 1
+        return self.clock
+
+    def get(self, puzzle):
+        """Returns the cached solution of the {(row, col): value} puzzle, None on a miss."""
+        key = format_line(puzzle)
+        row = self.connection.execute(
+            "SELECT solution FROM solutions WHERE puzzle = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self.connection:
+            self.connection.execute(
+                "UPDATE solutions SET used = ? WHERE puzzle = ?", (self.tick(), key)
+            )
+        return parse_line(row[0])
+
+    def stats(self, puzzle):
+        """Returns the solver stats recorded with the puzzle's solution, None if unknown."""
+        row = self.connection.execute(
+            "SELECT stats FROM solutions WHERE puzzle = ?", (format_line(puzzle),)
+        ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def put(self, puzzle, solution, stats=None):
+        """Caches the solution and stats of the puzzle, evicting the least recently used beyond maxsize."""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)",
+                (
+                    format_line(puzzle),
+                    format_line(solution),
+                    json.dumps(stats) if stats is not None else None,
+                    self.tick(),
+                ),
+            )
+            excess = len(self) - self.maxsize
+            if excess > 0:
+                self.connection.execute(
+                    """DELETE FROM solutions WHERE puzzle IN (
+                        SELECT puzzle FROM solutions ORDER BY used LIMIT ?
+                    )""",
+                    (excess,),
+                )
@@ -0,0 +1,136 @@
+""" This module contains the headless Sudoku solver command line, it never imports pygame. """
+
+import argparse
+import sys
+from collections import deque
+from os import makedirs, walk
+from os.path import basename, isdir, join
+
+from batch import solve_many, solve_vectorized
+from sudoku import format_line, format_puzzle, parse_line, parse_puzzle
+from sudokuai import ENGINES
+
+
+def puzzle_paths(paths):
+    """Expands directories, recursively, into their ".txt" puzzle files."""
+    for path in paths:
+        if isdir(path):
+            for root, dirs, names in walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if name.endswith(".txt"):
+                        yield join(root, name)
+        else:
+            yield path
+
+
+def read_lines(paths, sources):
+    """Yields the puzzle of each non-empty line of the files (stdin for "-" or no files).
+
+    The "path:line" source of each puzzle is appended to sources, malformed lines are
+    reported and yield None.
+    """
+    for path in paths or ["-"]:
+        stream = sys.stdin if path == "-" else open(path)
+        try:
+            for number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                sources.append(f"{path}:{number}")
+                try:
+                    yield parse_line(line)
+                except ValueError as error:
+                    print(f"{path}:{number}: {error}", file=sys.stderr)
+                    yield None
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def main(argv=None):
+    """Solves the puzzles given on the command line (or stdin) and writes their solutions."""
+    parser = argparse.ArgumentParser(
+        description='Solve Sudoku puzzles written one row per line with "#" for blanks.'
+    )
+    parser.add_argument(
+        "paths", nargs="*", help="puzzle files or directories, reads stdin if omitted"
+    )
+    parser.add_argument("-e", "--engine", choices=ENGINES, default="mac")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="solver processes, 0 for one per core (default: 1)",
+    )
+    parser.add_argument("--chunksize", type=int, default=8)
+    parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="propagate the puzzles together with NumPy, search only the leftovers",
+    )
+    parser.add_argument(
+        "-o", "--output", help="directory to write solutions to instead of stdout"
+    )
+    parser.add_argument(
+        "--cache", help="persistent solution cache (SQLite) to reuse solutions from"
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="read 81-character puzzle lines and write one solution line each",
+    )
+    args = parser.parse_args(argv)
+    if args.stream and args.output:
+        parser.error("--stream writes to stdout, it cannot be used with --output.")
+
+    sources = deque()
+    if args.stream:
+        puzzles = read_lines(args.paths, sources)
+    elif args.paths:
+        puzzles = puzzle_paths(args.paths)
+    else:
+        puzzles = [parse_puzzle(sys.stdin.read())]
+    if args.output:
+        makedirs(args.output, exist_ok=True)
+
+    if args.vectorized:
+        results = solve_vectorized(puzzles, engine=args.engine)
+    else:
+        results = solve_many(
+            puzzles,
+            engine=args.engine,
+            workers=args.workers or None,
+            chunksize=args.chunksize,
+            cache_path=args.cache,
+        )
+    status = 0
+    if args.stream:
+        # Results come in input order, one per line read.
+        for puzzle, solution in results:
+            source = sources.popleft()
+            if solution is None:
+                if puzzle is not None:
+                    print(f"{source}: no solution.", file=sys.stderr)
+                status = 1
+            sys.stdout.write((format_line(solution) if solution else "") + "\n")
+        return status
+    for count, (puzzle, solution) in enumerate(results):
+        path = puzzle if isinstance(puzzle, str) else "stdin.txt"
+        if solution is None:
+            print(f"{path}: no solution.", file=sys.stderr)
+            status = 1
+            continue
+        if args.output:
+            with open(join(args.output, basename(path)), "w") as output:
+                output.write(format_puzzle(solution) + "\n")
+        else:
+            if count:
+                print()
+            print(format_puzzle(solution))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
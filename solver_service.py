@@ -0,0 +1,86 @@
+""" This module contains the background solver service polled by the game loop. """
+
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+
+class Cancelled(Exception):
+    """Raised from the search hooks to stop a cancelled job."""
+
+
+class SolverJob:
+
+    """A solve or solution count submitted to the SolverService.
+
+    The game polls done() each frame and reads result() once done, nodes counts
+    the search assignments so far to show progress.
+    """
+
+    def __init__(self, ai, limit=None):
+        self.ai = ai
+        self.limit = limit
+        self.nodes = 0
+        self.cancelled = False
+        self.future = None
+
+    def run(self):
+        """Runs the job on the service thread, returns the solution or the solution count."""
+        hook = self.ai.on_assign
+
+        def on_assign(cell, value, depth):
+            if self.cancelled:
+                raise Cancelled()
+            self.nodes += 1
+            if hook is not None:
+                hook(cell, value, depth)
+
+        self.ai.on_assign = on_assign
+        try:
+            if self.limit is None:
+                return self.ai.solve()
+            return self.ai.count_solutions(limit=self.limit)
+        finally:
+            self.ai.on_assign = hook
+
+    def cancel(self):
+        """Stops the job at its next search step, or before it starts."""
+        self.cancelled = True
+        self.future.cancel()
+
+    def done(self):
+        """Returns True once the job finished or was cancelled."""
+        return self.future.done()
+
+    def result(self):
+        """Returns the result of a done job, None if it was cancelled."""
+        try:
+            return self.future.result()
+        except (Cancelled, CancelledError):
+            return None
+
+
+class SolverService:
+
+    """Runs SudokuAI jobs one at a time on a background thread so the game never waits on search."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.jobs = set()
+
+    def submit(self, ai, limit=None):
+        """Queues ai.solve(), or ai.count_solutions(limit) if a limit is given, and returns its job."""
+        self.jobs = {job for job in self.jobs if not job.done()}
+        job = SolverJob(ai, limit)
+        job.future = self.executor.submit(job.run)
+        self.jobs.add(job)
+        return job
+
+    def cancel_all(self):
+        """Cancels all unfinished jobs."""
+        for job in self.jobs:
+            job.cancel()
+        self.jobs = set()
+
+    def shutdown(self):
+        """Cancels the jobs and stops the thread."""
+        self.cancel_all()
+        self.executor.shutdown(wait=True)
@@ -5,13 +5,172 @@ from os.path import join
 from random import choice
 
 
+def house_of(row, col, box=3):
+    """Returns the house number (1 to box * box, row-major) of the cell located at (row, col)."""
+    return box * ((row - 1) // box) + (col - 1) // box + 1
+
+
+# Digits of values 1 to 25, boards up to 25 x 25 can be read and written.
+DIGITS = "123456789ABCDEFGHIJKLMNOP"
+
+
+class Geometry:
+
+    """Board geometry of houses of box x box cells, precomputed once and shared by the game and the AI.
+
+    Cells are (row, col) tuples, rows, cols and houses are numbered 1 to size = box * box.
+    Cell (row, col) has flat index size * (row - 1) + (col - 1).
+    """
+
+    def __init__(self, box):
+        size = box * box
+        self.box = box
+        self.size = size
+        self.cells = tuple(
+            (row, col) for row in range(1, size + 1) for col in range(1, size + 1)
+        )
+        self.houses = {cell: house_of(*cell, box) for cell in self.cells}
+        self.row_units = {
+            row: tuple((row, col) for col in range(1, size + 1))
+            for row in range(1, size + 1)
+        }
+        self.col_units = {
+            col: tuple((row, col) for row in range(1, size + 1))
+            for col in range(1, size + 1)
+        }
+        self.house_units = {house: [] for house in range(1, size + 1)}
+        for cell in self.cells:
+            self.house_units[self.houses[cell]].append(cell)
+        self.house_units = {
+            house: tuple(unit) for house, unit in self.house_units.items()
+        }
+        self.peers = {
+            cell: frozenset(
+                self.row_units[cell[0]]
+                + self.col_units[cell[1]]
+                + self.house_units[self.houses[cell]]
+            )
+            - {cell}
+            for cell in self.cells
+        }
+        self.arcs = {
+            cell: tuple((peer, cell) for peer in sorted(self.peers[cell]))
+            for cell in self.cells
+        }
+
+        # Same peers with cells as flat indices.
+        self.peer_indices = tuple(
+            tuple(self.index(*peer) for peer in sorted(self.peers[cell]))
+            for cell in self.cells
+        )
+
+        # Units as tuples of flat indices, rows are units 0 to size - 1, then cols and houses.
+        self.unit_indices = tuple(
+            tuple(self.index(*cell) for cell in unit)
+            for units in (self.row_units, self.col_units, self.house_units)
+            for unit in units.values()
+        )
+        self.cell_units = tuple(
+            (row - 1, size + col - 1, 2 * size + self.houses[(row, col)] - 1)
+            for row, col in self.cells
+        )
+
+    def index(self, row, col):
+        """Returns the flat index of the cell located at (row, col)."""
+        return self.size * (row - 1) + (col - 1)
+
+
+GEOMETRIES = dict()
+
+
+def get_geometry(box=3):
+    """Returns the shared Geometry of boards with houses of box x box cells."""
+    if not 2 <= box <= 5:
+        raise ValueError(f"Box size must be 2 to 5, got {box}.")
+    if box not in GEOMETRIES:
+        GEOMETRIES[box] = Geometry(box)
+    return GEOMETRIES[box]
+
+
+# The classic 9 x 9 board.
+GEOMETRY = get_geometry(3)
+CELLS = GEOMETRY.cells
+HOUSES = GEOMETRY.houses
+ROW_UNITS = GEOMETRY.row_units
+COL_UNITS = GEOMETRY.col_units
+HOUSE_UNITS = GEOMETRY.house_units
+PEERS = GEOMETRY.peers
+ARCS = GEOMETRY.arcs
+PEER_INDICES = GEOMETRY.peer_indices
+UNIT_INDICES = GEOMETRY.unit_indices
+CELL_UNITS = GEOMETRY.cell_units
+
+
+def parse_puzzle(text):
+    """Parses a puzzle with one row per line, "#" (or "." and "0") for blanks, into a {(row, col): value} dictionary."""
+    puzzle = dict()
+    rows = [row.replace(" ", "") for row in text.splitlines()]
+    for row, line in enumerate((row for row in rows if row), start=1):
+        for col, cell in enumerate(line, start=1):
+            if cell not in "#.0":
+                puzzle[(row, col)] = DIGITS.index(cell.upper()) + 1
+    return puzzle
+
+
+def read_puzzle(path):
+    """Reads a puzzle file into a {(row, col): value} dictionary."""
+    with open(path) as puzzle:
+        return parse_puzzle(puzzle.read())
+
+
+def format_puzzle(values, box=3):
+    """Formats a {(row, col): value} dictionary as one row per line with "#" for blanks."""
+    size = box * box
+    return "\n".join(
+        "".join(
+            DIGITS[values[(row, col)] - 1] if values.get((row, col)) else "#"
+            for col in range(1, size + 1)
+        )
+        for row in range(1, size + 1)
+    )
+
+
+def parse_line(line, box=3):
+    """Parses a one line puzzle (81 characters for box 3), "#", "." or "0" for blanks, into a {(row, col): value} dictionary."""
+    geometry = get_geometry(box)
+    digits = DIGITS[: geometry.size]
+    line = line.strip()
+    if len(line) != len(geometry.cells):
+        raise ValueError(f"Expected {len(geometry.cells)} characters, got {len(line)}.")
+    puzzle = dict()
+    for cell, char in zip(geometry.cells, line):
+        if char not in "#.0":
+            value = digits.find(char.upper()) + 1
+            if not value:
+                raise ValueError(f'Invalid character "{char}".')
+            puzzle[cell] = value
+    return puzzle
+
+
+def format_line(values, box=3):
+    """Formats a {(row, col): value} dictionary as a one line puzzle with "." for blanks."""
+    return "".join(
+        DIGITS[values[cell] - 1] if values.get(cell) else "."
+        for cell in get_geometry(box).cells
+    )
+
+
 class Sudoku:
 
     """Sudoku game."""
 
-    def __init__(self, *, mode="easy", puzzle={}):
+    def __init__(self, *, mode="easy", puzzle={}, store=None, box=3):
+        self.geometry = get_geometry(box)
+        self.box = box
+        self.size = self.geometry.size
         self.puzzle_path = None
         self.puzzle = puzzle
+        self.store = store
         if mode in ["easy", "medium", "hard"]:
             self.instanciate_fields()
             self.get_puzzle(mode)
@@ -22,7 +181,10 @@ class Sudoku:
                 self.initialize()
 
     def get_puzzle(self, mode):
-        """Gets a random puzzle's path."""
+        """Gets a random puzzle from the store, or a random puzzle's path without one."""
+        if self.store is not None:
+            self.puzzle = self.store.random(mode)
+            return
         puzzles_path = f"assets/puzzles/{mode}/"
         puzzles = [
             puzzle for puzzle in listdir(puzzles_path) if puzzle.endswith(".txt")
@@ -34,43 +196,47 @@ class Sudoku:
     def instanciate_fields(self):
         """Initialises necessary fields."""
 
-        self.houses = {i: set() for i in range(1, 10)}
-        self.rows = {i: dict() for i in range(1, 10)}
-        self.cols = {i: dict() for i in range(1, 10)}
-        self.cells = dict()
+        # Board state as flat arrays, indexed as in the geometry.
+        count = len(self.geometry.cells)
+        self.values = [0] * count
+        self.colors = [1] * count
+        # Occurrences of each digit per unit, digit d of unit u at (size + 1) * u + d.
+        self.digit_counts = [0] * (3 * self.size * (self.size + 1))
         self.value_counts = 0
+        # Repeated digits over all units, 0 when the board has no conflict.
         self.conflict_counts = 0
         self.revealed = set()
 
-        # Initialises cells with their respective associations
-        for row in range(1, 10):
-            for col in range(1, 10):
-
-                r = 1 if row in [1, 2, 3] else 2 if row in [4, 5, 6] else 3
-                c = 1 if col in [1, 2, 3] else 2 if col in [4, 5, 6] else 3
-                house = 3 * (r - 1) + c
-
-                cell = Cell(row, col, house, 0)
-                self.rows[row][col] = cell
-                self.cols[col][row] = cell
-                self.houses[house].add(cell)
-                self.cells[(row, col)] = cell
+        # Cells are lightweight views of the arrays
+        self.cells = {
+            cell: Cell(self, index) for index, cell in enumerate(self.geometry.cells)
+        }
+
+        # Edits as tuples of (x, y, old value, old color, value, color) deltas
+        self.history = []
+        self.undone = []
+        self.take_snapshot()
+
+    def take_snapshot(self):
+        """Keeps an immutable copy of the board, restored by reset."""
+        self.snapshot = (
+            tuple(self.values),
+            tuple(self.colors),
+            tuple(self.digit_counts),
+            self.value_counts,
+            self.conflict_counts,
+            frozenset(self.revealed),
+        )
 
     def initialize(self):
         """Initialises game cells with default values of puzzle from puzzle file or puzzle dictionary."""
         if self.puzzle:
             for location, value in self.puzzle.items():
-                self.add_value(*location, value, 0)
+                self.set_value(*location, value, 0)
         elif self.puzzle_path is not None:
-            with open(self.puzzle_path) as puzzle:
-                row_count = 1
-                for row in puzzle.read().split("\n"):
-                    col_count = 1
-                    for cell in row.replace(" ", ""):
-                        if cell != "#":
-                            self.add_value(row_count, col_count, int(cell), 0)
-                        col_count += 1
-                    row_count += 1
+            for location, value in read_puzzle(self.puzzle_path).items():
+                self.set_value(*location, value, 0)
+        self.take_snapshot()
         return
 
     def add_value(self, x, y, value=0, color=1):
@@ -78,16 +244,44 @@ class Sudoku:
         assert (
             type(x) == type(1) and type(y) == type(1) and type(value) == type(1)
         )  # Reconfirm this step after
-        if not (0 < x < 10 and 0 < y < 10 and 0 <= value < 10):
+        size = self.size
+        if not (0 < x <= size and 0 < y <= size and 0 <= value <= size):
             raise ValueError("Invalid Argument.")
-        if self.cells[(x, y)].value == value:
+        index = size * (x - 1) + (y - 1)
+        if self.values[index] == value:
             return
-        if not self.cells[(x, y)].value and value:
-            self.value_counts += 1
-        self.cells[(x, y)].value = value
-        self.cells[(x, y)].color = color
-        self.revealed.add((x, y))
-        self.update_conflicts(x, y)
+        old_color = self.colors[index]
+        self.history.append(((x, y, self.values[index], old_color, value, color),))
+        self.undone.clear()
+        self.set_value(x, y, value, color)
+        return
+
+    def add_values(self, values, color=1):
+        """Adds the values of a {(row, col): value} dictionary as a single edit."""
+        start = len(self.history)
+        for location, value in values.items():
+            self.add_value(*location, value, color)
+        edit = tuple(delta for edit in self.history[start:] for delta in edit)
+        del self.history[start:]
+        if edit:
+            self.history.append(edit)
+
+    def set_value(self, x, y, value, color):
+        """Sets value and color of the cell without recording the edit."""
+        index = self.size * (x - 1) + (y - 1)
+        old_value = self.values[index]
+        if old_value == value:
+            return
+        if old_value:
+            self.count_value(index, old_value, -1)
+        if value:
+            self.count_value(index, value, 1)
+            self.revealed.add((x, y))
+        else:
+            self.revealed.discard((x, y))
+        self.value_counts += bool(value) - bool(old_value)
+        self.values[index] = value
+        self.colors[index] = color
         return
 
     def add_default_value(self, x, y, value):
@@ -96,50 +290,38 @@ class Sudoku:
 
     def delete_value(self, x, y):
         """Deletes value of the cell."""
-        if self.cells[(x, y)].color == 0:
+        if self.colors[self.size * (x - 1) + (y - 1)] == 0:
             return
         self.add_value(x, y)
-        self.value_counts -= 1
-        self.revealed.discard((x, y))
-        self.update_conflicts(x, y)
         return
 
-    def update_conflicts(self, x, y):
-        """Updates the conflict list of all cells related to the current cell."""
-
-        cell = self.cells[(x, y)]
-        before_update = cell.get_conflicts_count()
-
-        for c in self.houses[cell.get_house()]:
-            if cell.get_value() == c.get_value() and cell != c:
-                cell.add_conflict(c)
-                c.add_conflict(cell)
-            else:
-                cell.delete_conflict(c)
-                c.delete_conflict(cell)
-
-        for c in self.rows[cell.get_row()].values():
-            if cell.get_value() == c.get_value() and cell != c:
-                cell.add_conflict(c)
-                c.add_conflict(cell)
-            else:
-                cell.delete_conflict(c)
-                c.delete_conflict(cell)
-
-        for c in self.cols[cell.get_col()].values():
-            if cell.get_value() == c.get_value() and cell != c:
-                cell.add_conflict(c)
-                c.add_conflict(cell)
-            else:
-                cell.delete_conflict(c)
-                c.delete_conflict(cell)
-        after_update = cell.get_conflicts_count()
-        self.conflict_counts += before_update - after_update
-        return
+    def count_value(self, index, value, step):
+        """Adds step to the occurrences of value in the three units of the cell at index."""
+        counts = self.digit_counts
+        stride = self.size + 1
+        for unit in self.geometry.cell_units[index]:
+            count = counts[stride * unit + value]
+            if step > 0 and count:
+                self.conflict_counts += 1
+            elif step < 0 and count > 1:
+                self.conflict_counts -= 1
+            counts[stride * unit + value] = count + step
+
+    def cell_conflicts(self, index):
+        """Returns the indices of the peers sharing the value of the cell at index."""
+        value = self.values[index]
+        counts = self.digit_counts
+        stride = self.size + 1
+        units = self.geometry.cell_units[index]
+        if not value or all(counts[stride * u + value] < 2 for u in units):
+            return set()
+        values = self.values
+        peers = self.geometry.peer_indices[index]
+        return {peer for peer in peers if values[peer] == value}
 
     def check_goal_state(self):
         """Checks whether this state of the game is the goal."""
-        if self.value_counts == 81 and self.conflict_counts == 0:
+        if self.value_counts == len(self.values) and self.conflict_counts == 0:
             return True
         return False
 
@@ -155,23 +337,79 @@ class Sudoku:
         """Returns the cell located at (x, y), where x is the row number and y is the column number."""
         return self.cells[(x, y)]
 
+    def undo(self):
+        """Reverts the last edit, returns False when there is nothing to undo."""
+        if not self.history:
+            return False
+        edit = self.history.pop()
+        for x, y, old_value, old_color, _, _ in reversed(edit):
+            self.set_value(x, y, old_value, old_color)
+        self.undone.append(edit)
+        return True
+
+    def redo(self):
+        """Reapplies the last undone edit, returns False when there is nothing to redo."""
+        if not self.undone:
+            return False
+        edit = self.undone.pop()
+        for x, y, _, _, value, color in edit:
+            self.set_value(x, y, value, color)
+        self.history.append(edit)
+        return True
+
     def reset(self):
         """Resets the game with the default puzzle values."""
-        self.instanciate_fields()
-        self.initialize()
+        values, colors, digit_counts, value_counts, conflict_counts, revealed = (
+            self.snapshot
+        )
+        self.values[:] = values
+        self.colors[:] = colors
+        self.digit_counts[:] = digit_counts
+        self.value_counts = value_counts
+        self.conflict_counts = conflict_counts
+        self.revealed = set(revealed)
+        self.history.clear()
+        self.undone.clear()
 
 
 class Cell:
 
-    """Sudoku Cell data structure."""
+    """Sudoku Cell data structure, a view of one cell of the board's arrays."""
+
+    __slots__ = ("board", "index")
+
+    def __init__(self, board, index):
+        self.board = board
+        self.index = index
 
-    def __init__(self, x, y, house, value):
-        self.x = x
-        self.y = y
-        self.house = house
-        self.value = value
-        self.color = 1  # 0 for default cell, 1 for user cell, 2 for hint cell
-        self.conflicts = set()
+    @property
+    def x(self):
+        return self.index // self.board.size + 1
+
+    @property
+    def y(self):
+        return self.index % self.board.size + 1
+
+    @property
+    def house(self):
+        geometry = self.board.geometry
+        return geometry.houses[geometry.cells[self.index]]
+
+    @property
+    def value(self):
+        return self.board.values[self.index]
+
+    @property
+    def color(self):
+        """0 for default cell, 1 for user cell, 2 for hint cell."""
+        return self.board.colors[self.index]
+
+    @property
+    def conflicts(self):
+        """The set of cells in conflict with this cell."""
+        board = self.board
+        locations = board.geometry.cells
+        return {board.cells[locations[peer]] for peer in board.cell_conflicts(self.index)}
 
     def get_value(self):
         return self.value
@@ -200,7 +438,7 @@ class Cell:
         """Returns the conflicts present in the row of this cell."""
         row_conflicts = set()
         for conflict in self.conflicts:
-            if self.house == conflict.get_row():
+            if self.x == conflict.get_row():
                 row_conflicts.add(conflict)
         return row_conflicts
 
@@ -208,7 +446,7 @@ class Cell:
         """Returns the conflicts present in the column of this cell."""
         col_conflicts = set()
         for conflict in self.conflicts:
-            if self.house == conflict.get_col():
+            if self.y == conflict.get_col():
                 col_conflicts.add(conflict)
         return col_conflicts
 
@@ -216,38 +454,21 @@ class Cell:
         """Returns the location tuple (row, col) of this cell."""
         return (self.x, self.y)
 
-    def get_conflits(self):
+    def get_conflicts(self):
         """Returns the conflicts list of this cell."""
         return self.conflicts
 
+    get_conflits = get_conflicts
+
     def get_conflicts_count(self):
         """Returns the conflict count."""
-        return len(self.conflicts)
-
-    def add_conflict(self, other):
-        """Adds the other cell to conflict list."""
-        if not isinstance(other, Cell):
-            raise TypeError(
-                f'Argument must be type "Cell" got instead type "{type(other)}".'
-            )
-        if self.value != 0 and other.value != 0:
-            self.conflicts.add(other)
-        return
-
-    def delete_conflict(self, other):
-        """Deletes the other cell from conflict list, if doesn't exist do nothing."""
-        if not isinstance(other, Cell):
-            raise TypeError(
-                f'Argument must be type "Cell" got instead type "{type(other)}".'
-            )
-        self.conflicts.discard(other)
-        return
+        return len(self.board.cell_conflicts(self.index))
 
     def __eq__(self, other):
-        return self.value == other.value and self.x == other.x and self.y == other.y
+        return self.value == other.value and self.index == other.index
 
     def __hash__(self):
-        return hash((str(self.x), str(self.y)))
+        return hash(self.index)
 
     def __repr__(self):
         return f"Cell: (x, y) = ({self.x}, {self.y}) value = {self.value}"
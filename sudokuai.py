@@ -1,20 +1,104 @@
 """ This module contains Sudoku AI components. """
 
+from collections import deque
 from random import choice
-from copy import deepcopy
+
+from sudoku import get_geometry
+
+
+# Solving engines, "mac" keeps domains as sets, "bitset" as integer masks and
+# "dlx" solves the exact cover problem with Dancing Links. Engines other than "mac"
+# are solver classes registered in SOLVERS at the end of the module.
+ENGINES = ("mac", "bitset", "dlx")
+
+# Bit masks, bit (value - 1) is set when value is in the domain. Masks of 9 x 9 boards
+# are counted from a table, wider ones (16 or 25 bits) with bin().
+ALL_VALUES = 0b111111111
+POPCOUNTS = tuple(bin(mask).count("1") for mask in range(ALL_VALUES + 1))
+
+
+def popcount(mask):
+    """Returns the number of values in the mask."""
+    if mask <= ALL_VALUES:
+        return POPCOUNTS[mask]
+    return bin(mask).count("1")
+
+
+def lowest_bit(mask):
+    """Returns the lowest set bit of the mask."""
+    return mask & -mask
+
+
+def value_to_bit(value):
+    """Returns the bit of the value."""
+    return 1 << (value - 1)
+
+
+def bit_to_value(bit):
+    """Returns the value of a single bit."""
+    return bit.bit_length()
+
+
+def new_stats():
+    """Returns zeroed search counters.
+
+    nodes: search nodes, backtracks: values undone, revisions: arcs processed,
+    pruned: domain values removed, max_queue: longest propagation queue,
+    max_depth: deepest search level.
+    """
+    return {
+        "nodes": 0,
+        "backtracks": 0,
+        "revisions": 0,
+        "pruned": 0,
+        "max_queue": 0,
+        "max_depth": 0,
+    }
+
+
+def mask_values(mask):
+    """Yields the bits of the mask in increasing order."""
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
 
 
 class SudokuAI:
 
-    """Sudoku AI for Hints and Solving using "Maintaining Arc Consistency Algorithm"."""
+    """Sudoku AI for Hints and Solving using "Maintaining Arc Consistency Algorithm".
 
-    def __init__(self, sudoku):
+    Optional hooks are called during search, on_assign(cell, value, depth),
+    on_prune(cell, value) and on_backtrack(cell, value, depth), where cell is a
+    (row, col) tuple. Search counters of the last solve are kept in stats.
+    An optional cache, with get(puzzle) and put(puzzle, solution, stats) methods,
+    is consulted by solve() before searching and filled after, for 9 x 9 boards only.
+    """
+
+    def __init__(
+        self,
+        sudoku,
+        engine="mac",
+        *,
+        cache=None,
+        on_assign=None,
+        on_prune=None,
+        on_backtrack=None,
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f'Unknown engine "{engine}", expected one of {ENGINES}.')
         self.sudoku = sudoku
-        self.domains = {
-            (i, j): set(k for k in range(1, 10))
-            for i in range(1, 10)
-            for j in range(1, 10)
-        }
+        self.geometry = sudoku.geometry
+        self.engine = engine
+        self.cache = cache
+        self.on_assign = on_assign
+        self.on_prune = on_prune
+        self.on_backtrack = on_backtrack
+        values = range(1, self.geometry.size + 1)
+        self.domains = {var: set(values) for var in self.geometry.cells}
+        # Undo log of (var, value) domain removals, reverted on backtrack.
+        self.trail = []
+        self.stats = new_stats()
         self.initial_moves = set(
             (cell[0], cell[1])
             for cell in self.sudoku.cells.keys()
@@ -23,27 +107,68 @@ class SudokuAI:
 
     def solve(self):
         """Solves the problem and returns the solution as a dictionary."""
+        # Canonical forms and stored lines of the caches are 9 x 9 only
+        cache = self.cache if self.geometry.box == 3 else None
+        if cache is not None:
+            self.solution = cache.get(self.givens())
+            if self.solution is not None:
+                return self.solution
+        self.solution = next(self.solutions(), None)
+        if cache is not None and self.solution is not None:
+            cache.put(self.givens(), self.solution, self.stats)
+        return self.solution
+
+    def givens(self):
+        """Returns the initial values of the problem as a {(row, col): value} dictionary."""
+        return {var: self.sudoku.cells[var].value for var in self.initial_moves}
+
+    def solutions(self):
+        """Yields the solutions of the problem one by one, each dictionary is only valid until the next one."""
+        if self.engine in SOLVERS:
+            solver = SOLVERS[self.engine](
+                self.givens(),
+                box=self.geometry.box,
+                on_assign=self.on_assign,
+                on_prune=self.on_prune,
+                on_backtrack=self.on_backtrack,
+            )
+            self.stats = solver.stats
+            yield from solver.solutions()
+            return
+        values = range(1, self.geometry.size + 1)
+        self.domains = {var: set(values) for var in self.geometry.cells}
+        self.trail = []
+        self.stats = new_stats()
         assignment = dict()
         arcs_list = []
         for var in self.initial_moves:
             assignment[var] = self.sudoku.cells[var].value
             self.domains[var] = {self.sudoku.cells[var].value}
-            arcs = [(neighbor, var) for neighbor in self.neighbors(*var)]
-            arcs_list.extend(arcs)
+            arcs_list.extend(self.geometry.arcs[var])
         self.ac3(arcs_list)
-        self.solution = self.backtrack(assignment)
-        return self.solution
+        yield from self.search(assignment)
+
+    def count_solutions(self, limit=2, solutions=None):
+        """Counts the solutions, stopping as soon as limit are found.
+
+        Found solutions are appended to the solutions list if one is given, the first
+        one is also kept as self.solution for hints.
+        """
+        self.solution = None
+        count = 0
+        for solution in self.solutions():
+            if self.solution is None:
+                self.solution = dict(solution)
+            if solutions is not None:
+                solutions.append(dict(solution))
+            count += 1
+            if count >= limit:
+                break
+        return count
 
     def neighbors(self, x: int, y: int):
-        """Returns the neighbors of the cell."""
-        rows = set((x, i) for i in range(1, 10))
-        cols = set((j, y) for j in range(1, 10))
-        a = (1, 2, 3) if x in (1, 2, 3) else (4, 5, 6) if x in (4, 5, 6) else (7, 8, 9)
-        b = (1, 2, 3) if y in (1, 2, 3) else (4, 5, 6) if y in (4, 5, 6) else (7, 8, 9)
-        houses = set((i, j) for i in a for j in b)
-        neighbors = rows.union(cols).union(houses)
-        neighbors.remove((x, y))
-        return neighbors
+        """Returns the neighbors of the cell as a frozenset."""
+        return self.geometry.peers[(x, y)]
 
     def hint(self):
         """Returns a random (location, value) pair for an unassigned cell or a wrongly assigned cell."""
@@ -52,10 +177,9 @@ class SudokuAI:
             hint_var = choice(unassigned_vars)
         else:
             wrong_assigned_vars = [
-                (i, j)
-                for i in range(1, 10)
-                for j in range(1, 10)
-                if self.sudoku.cells[(i, j)].value != self.solution[(i, j)]
+                var
+                for var in self.geometry.cells
+                if self.sudoku.cells[var].value != self.solution[var]
             ]
             hint_var = choice(wrong_assigned_vars)
         hint = self.solution[hint_var]
@@ -63,6 +187,7 @@ class SudokuAI:
 
     def revise(self, neighbor, var):
         """Revises neighbor's domain according to var value. Returns True if revised False otherwise."""
+        self.stats["revisions"] += 1
         revised = False
         to_remove = []
         for val in self.domains[neighbor]:
@@ -76,26 +201,51 @@ class SudokuAI:
         if to_remove:
             revised = True
         for val in to_remove:
-            self.domains[neighbor].remove(val)
+            self.remove_value(neighbor, val)
         return revised
 
+    def remove_value(self, var, val):
+        """Removes the value from var's domain and records it on the trail."""
+        self.domains[var].remove(val)
+        self.trail.append((var, val))
+        self.stats["pruned"] += 1
+        if self.on_prune is not None:
+            self.on_prune(var, val)
+
+    def undo(self, mark):
+        """Restores the domain values removed since the trail had length mark."""
+        trail = self.trail
+        while len(trail) > mark:
+            var, val = trail.pop()
+            self.domains[var].add(val)
+
     def ac3(self, arcs):
         """Make domain values arc consistent with the assignment."""
-        while len(arcs):
-            neighbor, var = arcs.pop(0)
+        queue = deque()
+        queued = set()
+        for arc in arcs:
+            if arc not in queued:
+                queue.append(arc)
+                queued.add(arc)
+        stats = self.stats
+        while queue:
+            if len(queue) > stats["max_queue"]:
+                stats["max_queue"] = len(queue)
+            arc = queue.popleft()
+            queued.remove(arc)
+            neighbor, var = arc
             if self.revise(neighbor, var):
                 if not len(self.domains[var]):
                     return False
                 for z in self.neighbors(*neighbor) - {var}:
-                    if (z, neighbor) not in arcs:
-                        arcs.append((z, neighbor))
+                    if (z, neighbor) not in queued:
+                        queue.append((z, neighbor))
+                        queued.add((z, neighbor))
         return True
 
     def order_domain_values(self, var, assignment):
         """Returns domain values of the var ordered with priority."""
-        variables = self.neighbors(*var) - (
-            set(self.sudoku.cells.keys()) - assignment.keys() - {var}
-        )
+        variables = self.neighbors(*var) & assignment.keys()
         values = []
         for val in self.domains[var]:
             count = 0
@@ -109,21 +259,22 @@ class SudokuAI:
 
     def select_unassigned_variable(self, assignment):
         """Returns an unassigned variable selected with priority."""
-        variables = set(self.sudoku.cells.keys()) - set(assignment.keys())
-        variables_list = []
-        for var in variables:
-            variables_list.append((var, len(self.domains[var])))
-        return min(variables_list, key=lambda x: x[1])[0]
+        domains = self.domains
+        return min(
+            set(self.geometry.cells) - assignment.keys(),
+            key=lambda var: len(domains[var]),
+        )
 
     def assignment_complete(self, assignment):
         """Checks whether the assignment is complete."""
-        return len(assignment) == 81
+        return len(assignment) == len(self.geometry.cells)
 
     def consistent(self, assignment):
         """Checks whether the assignment is consistent."""
-        rows = [[set(), 0] for i in range(1, 10)]
-        cols = [[set(), 0] for i in range(1, 10)]
-        houses = [[set(), 0] for i in range(1, 10)]
+        size = self.geometry.size
+        rows = [[set(), 0] for i in range(size)]
+        cols = [[set(), 0] for i in range(size)]
+        houses = [[set(), 0] for i in range(size)]
         for var in assignment.keys():
             rows[self.sudoku.cells[var].x - 1][0].add(assignment[var])
             rows[self.sudoku.cells[var].x - 1][1] += 1
@@ -143,23 +294,437 @@ class SudokuAI:
         return True
 
     def backtrack(self, assignment):
-        """Backtracking Search interleaved with Arc consistency."""
+        """Backtracking Search interleaved with Arc consistency. Returns the first complete assignment."""
+        return next(self.search(assignment), None)
+
+    def search(self, assignment):
+        """Backtracking Search interleaved with Arc consistency, yields every complete assignment."""
+        stats = self.stats
+        stats["nodes"] += 1
+        depth = len(assignment) - len(self.initial_moves)
+        if depth > stats["max_depth"]:
+            stats["max_depth"] = depth
         if self.assignment_complete(assignment):
-            return assignment
+            yield assignment
+            return
         var = self.select_unassigned_variable(assignment)
-        domain_values = deepcopy(self.domains)
+        mark = len(self.trail)
         for val in self.order_domain_values(var, assignment):
-            new_assignment = assignment.copy()
-            new_assignment[var] = val
-            if self.consistent(new_assignment):
+            assignment[var] = val
+            if self.on_assign is not None:
+                self.on_assign(var, val, depth)
+            if self.consistent(assignment):
                 arcs = [
                     (neighbor, var)
-                    for neighbor in self.neighbors(*var) - new_assignment.keys()
+                    for neighbor in self.neighbors(*var) - assignment.keys()
                 ]
-                self.domains[var] = {val}
+                for other in self.domains[var] - {val}:
+                    self.remove_value(var, other)
                 if self.ac3(arcs):
-                    result = self.backtrack(new_assignment)
-                    if result:
-                        return result
-                self.domains = domain_values
-        return None
+                    yield from self.search(assignment)
+                stats["backtracks"] += 1
+                if self.on_backtrack is not None:
+                    self.on_backtrack(var, val, depth)
+                self.undo(mark)
+            del assignment[var]
+
+
+class BitsetSolver:
+
+    """Maintaining Arc Consistency search over a flat array of domain masks, one bit per value.
+
+    Boards have houses of box x box cells, masks are 9 bits wide for the classic board
+    and 16 or 25 bits for box 4 and 5. Assignments propagate naked singles to the peers
+    and, unless hidden_singles is False, hidden singles within the units, which keeps
+    the search small on large boards.
+    """
+
+    def __init__(
+        self,
+        givens,
+        *,
+        box=3,
+        hidden_singles=True,
+        on_assign=None,
+        on_prune=None,
+        on_backtrack=None,
+    ):
+        geometry = get_geometry(box)
+        self.givens = givens
+        self.size = geometry.size
+        self.cells = geometry.cells
+        self.peers = geometry.peer_indices
+        self.units = geometry.unit_indices
+        self.cell_units = geometry.cell_units
+        self.all_values = (1 << self.size) - 1
+        self.hidden_singles = hidden_singles
+        self.domains = [self.all_values] * len(self.cells)
+        self.stats = new_stats()
+        self.on_assign = on_assign
+        self.on_prune = on_prune
+        self.on_backtrack = on_backtrack
+
+    def solve(self):
+        """Solves the problem and returns the solution as a dictionary, None if unsolvable."""
+        return next(self.solutions(), None)
+
+    def solutions(self):
+        """Yields the solutions of the problem one by one as dictionaries."""
+        domains = self.domains
+        decided = []
+        for (x, y), value in self.givens.items():
+            index = self.size * (x - 1) + (y - 1)
+            domains[index] = value_to_bit(value)
+            decided.append(index)
+        if not self.propagate(decided):
+            return
+        cells = self.cells
+        for domains in self.search():
+            yield {cells[i]: bit_to_value(mask) for i, mask in enumerate(domains)}
+
+    def assign(self, index, bit):
+        """Assigns the bit to the cell and propagates it. Returns False on a wipe out."""
+        domains = self.domains
+        if not domains[index] & bit:
+            return False
+        domains[index] = bit
+        return self.propagate([index])
+
+    def propagate(self, queue):
+        """Propagates the decided cells of the queue. Returns False on a wipe out.
+
+        Decided cells remove their value from the peers (naked singles), then every unit
+        with a changed cell is checked for a value missing from all of its cells, a wipe
+        out, or left in only one cell, which is then decided (hidden single).
+        """
+        domains = self.domains
+        stats = self.stats
+        on_prune = self.on_prune
+        all_peers = self.peers
+        units = self.units
+        cell_units = self.cell_units
+        all_values = self.all_values
+        changed = set()
+        for cell in queue:
+            changed.update(cell_units[cell])
+        while queue:
+            while queue:
+                if len(queue) > stats["max_queue"]:
+                    stats["max_queue"] = len(queue)
+                cell = queue.pop()
+                bit = domains[cell]
+                peers = all_peers[cell]
+                stats["revisions"] += len(peers)
+                for peer in peers:
+                    domain = domains[peer]
+                    if domain & bit:
+                        domain &= ~bit
+                        stats["pruned"] += 1
+                        if on_prune is not None:
+                            on_prune(self.cells[peer], bit_to_value(bit))
+                        if not domain:
+                            return False
+                        domains[peer] = domain
+                        changed.update(cell_units[peer])
+                        if not domain & (domain - 1):
+                            queue.append(peer)
+            if not self.hidden_singles:
+                break
+
+            # Hidden singles, values seen once in a unit are decided in their cell
+            for unit in changed:
+                cells = units[unit]
+                stats["revisions"] += len(cells)
+                once = twice = 0
+                for cell in cells:
+                    domain = domains[cell]
+                    twice |= once & domain
+                    once |= domain
+                if once != all_values:
+                    return False
+                singles = once & ~twice
+                while singles:
+                    bit = singles & -singles
+                    singles ^= bit
+                    for cell in cells:
+                        domain = domains[cell]
+                        if domain & bit:
+                            break
+                    else:
+                        # Another hidden single took the only cell of this value
+                        return False
+                    if domain != bit:
+                        self.prune(cell, domain & ~bit)
+                        domains[cell] = bit
+                        queue.append(cell)
+            changed = set()
+            for cell in queue:
+                changed.update(cell_units[cell])
+        return True
+
+    def prune(self, index, mask):
+        """Counts the values of the mask as pruned from the cell and reports them to on_prune."""
+        self.stats["pruned"] += popcount(mask)
+        if self.on_prune is not None:
+            for bit in mask_values(mask):
+                self.on_prune(self.cells[index], bit_to_value(bit))
+
+    def select_unassigned_variable(self):
+        """Returns the undecided cell with the fewest values, None if every cell is decided."""
+        best, best_count = None, self.size + 1
+        popcounts = POPCOUNTS if self.size <= 9 else None
+        for index, domain in enumerate(self.domains):
+            if domain & (domain - 1):
+                count = popcounts[domain] if popcounts else popcount(domain)
+                if count < best_count:
+                    best, best_count = index, count
+                    if count == 2:
+                        break
+        return best
+
+    def order_domain_values(self, index):
+        """Returns the bits of the cell's domain, least constraining first."""
+        domains = self.domains
+        peers = [domains[peer] for peer in self.peers[index]]
+        return sorted(
+            mask_values(domains[index]),
+            key=lambda bit: sum(1 for domain in peers if domain & bit),
+        )
+
+    def search(self, depth=0):
+        """Backtracking Search interleaved with Arc consistency, yields the domains each time every cell is decided."""
+        stats = self.stats
+        stats["nodes"] += 1
+        if depth > stats["max_depth"]:
+            stats["max_depth"] = depth
+        index = self.select_unassigned_variable()
+        if index is None:
+            yield self.domains
+            return
+        saved = self.domains[:]
+        for bit in self.order_domain_values(index):
+            if self.on_assign is not None:
+                self.on_assign(self.cells[index], bit_to_value(bit), depth)
+            if self.assign(index, bit):
+                yield from self.search(depth + 1)
+            stats["backtracks"] += 1
+            if self.on_backtrack is not None:
+                self.on_backtrack(self.cells[index], bit_to_value(bit), depth)
+            self.domains[:] = saved
+
+
+def exact_cover_rows(box=3):
+    """Returns the rows of the Sudoku exact cover matrix as (cell index, value, columns) tuples.
+
+    With n = box * box, the 4 n^2 columns are, n^2 each, a value in every cell, every
+    value in every row, in every column and in every house (324 columns for box 3).
+    """
+    geometry = get_geometry(box)
+    n = geometry.size
+    cells = n * n
+    rows = []
+    for index, (x, y) in enumerate(geometry.cells):
+        house = geometry.houses[(x, y)] - 1
+        for value in range(1, n + 1):
+            columns = (
+                index,
+                cells + n * (x - 1) + value - 1,
+                2 * cells + n * (y - 1) + value - 1,
+                3 * cells + n * house + value - 1,
+            )
+            rows.append((index, value, columns))
+    return rows
+
+
+def dancing_links(rows):
+    """Returns the links (left, right, up, down, column) of the full exact cover matrix of the rows.
+
+    Node 0 is the root, then one header per column, then four nodes per row in rows order.
+    """
+    headers = 1 + len({col for _, _, columns in rows for col in columns})
+    count = headers + 4 * len(rows)
+    left = [i - 1 for i in range(headers)] + [0] * (count - headers)
+    right = [i + 1 for i in range(headers)] + [0] * (count - headers)
+    left[0], right[headers - 1] = headers - 1, 0
+    up = list(range(count))
+    down = list(range(count))
+    column = list(range(headers)) + [0] * (count - headers)
+    node = headers
+    for _, _, columns in rows:
+        for k, col in enumerate(columns):
+            header = col + 1
+            left[node + k] = node + (k - 1) % 4
+            right[node + k] = node + (k + 1) % 4
+            column[node + k] = header
+            up[node + k] = up[header]
+            down[node + k] = header
+            down[up[header]] = node + k
+            up[header] = node + k
+        node += 4
+    return left, right, up, down, column
+
+
+EXACT_COVERS = dict()
+
+
+def exact_cover(box=3):
+    """Returns the shared (rows, links) of the exact cover matrix of the box, built on first use."""
+    if box not in EXACT_COVERS:
+        rows = exact_cover_rows(box)
+        EXACT_COVERS[box] = (rows, dancing_links(rows))
+    return EXACT_COVERS[box]
+
+
+class DLXSolver:
+
+    """Knuth's Algorithm X with Dancing Links over the Sudoku exact cover matrix, 729 x 324 for box 3.
+
+    Takes the same givens and hooks and keeps the same stats as BitsetSolver, on_prune
+    is called for every candidate unlinked from the matrix.
+    """
+
+    def __init__(
+        self, givens, *, box=3, on_assign=None, on_prune=None, on_backtrack=None
+    ):
+        geometry = get_geometry(box)
+        self.givens = givens
+        self.size = geometry.size
+        self.cells = geometry.cells
+        self.rows, links = exact_cover(box)
+        self.left, self.right, self.up, self.down, self.column = (
+            part[:] for part in links
+        )
+        # Root and column headers come first, every column starts with size rows
+        self.headers = 1 + 4 * len(self.cells)
+        self.sizes = [0] + [self.size] * (self.headers - 1)
+        self.stats = new_stats()
+        self.on_assign = on_assign
+        self.on_prune = on_prune
+        self.on_backtrack = on_backtrack
+        self.chosen = []
+
+    def solve(self):
+        """Solves the problem and returns the solution as a dictionary, None if unsolvable."""
+        return next(self.solutions(), None)
+
+    def solutions(self):
+        """Yields the solutions of the problem one by one as dictionaries."""
+        covered = set()
+        for (x, y), value in self.givens.items():
+            row = self.size * (self.size * (x - 1) + (y - 1)) + value - 1
+            columns = self.rows[row][2]
+            if covered.intersection(columns):
+                return
+            covered.update(columns)
+            for col in columns:
+                self.cover(col + 1)
+            self.chosen.append(row)
+        for chosen in self.search():
+            solution = dict()
+            for row in chosen:
+                index, value, _ = self.rows[row]
+                solution[self.cells[index]] = value
+            yield solution
+
+    def cover(self, header):
+        """Unlinks the column and every row crossing it from the other columns."""
+        left, right, up, down, column = (
+            self.left,
+            self.right,
+            self.up,
+            self.down,
+            self.column,
+        )
+        sizes = self.sizes
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        pruned = 0
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                sizes[column[j]] -= 1
+                j = right[j]
+            pruned += 1
+            if self.on_prune is not None:
+                index, value, _ = self.rows[(i - self.headers) // 4]
+                self.on_prune(self.cells[index], value)
+            i = down[i]
+        self.stats["revisions"] += 1
+        self.stats["pruned"] += pruned
+
+    def uncover(self, header):
+        """Links back the column and its rows, undoing cover(header)."""
+        left, right, up, down, column = (
+            self.left,
+            self.right,
+            self.up,
+            self.down,
+            self.column,
+        )
+        sizes = self.sizes
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                sizes[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def select_column(self):
+        """Returns the uncovered column with the fewest rows, None once every column is covered."""
+        right, sizes = self.right, self.sizes
+        header = right[0]
+        if not header:
+            return None
+        best, best_size = header, sizes[header]
+        while header and best_size > 1:
+            if sizes[header] < best_size:
+                best, best_size = header, sizes[header]
+            header = right[header]
+        return best
+
+    def search(self, depth=0):
+        """Algorithm X, yields the chosen rows each time every column is covered."""
+        stats = self.stats
+        stats["nodes"] += 1
+        if depth > stats["max_depth"]:
+            stats["max_depth"] = depth
+        header = self.select_column()
+        if header is None:
+            yield self.chosen
+            return
+        right, left, down = self.right, self.left, self.down
+        self.cover(header)
+        i = down[header]
+        while i != header:
+            row = (i - self.headers) // 4
+            index, value, _ = self.rows[row]
+            if self.on_assign is not None:
+                self.on_assign(self.cells[index], value, depth)
+            self.chosen.append(row)
+            j = right[i]
+            while j != i:
+                self.cover(self.column[j])
+                j = right[j]
+            yield from self.search(depth + 1)
+            j = left[i]
+            while j != i:
+                self.uncover(self.column[j])
+                j = left[j]
+            self.chosen.pop()
+            stats["backtracks"] += 1
+            if self.on_backtrack is not None:
+                self.on_backtrack(self.cells[index], value, depth)
+            i = down[i]
+        self.uncover(header)
+
+
+# Solver classes by engine name, each takes the givens, box size and hooks and has stats and solutions().
+SOLVERS = {"bitset": BitsetSolver, "dlx": DLXSolver}
@@ -0,0 +1,235 @@
+""" This module contains the headless frame time and input latency benchmark of the game window. """
+
+import argparse
+import json
+import random
+import sys
+import time
+from os import environ
+
+# No window or sound device is needed, set before pygame starts.
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from benchmark import percentile
+from runner import (
+    FPS,
+    Runner,
+    ai_button,
+    back_button_rect,
+    cells,
+    generate_button,
+    home_button,
+    info_button_rect,
+    play_button,
+    play_button_rect,
+    reset_button,
+    solve_button,
+    valid_button,
+)
+
+SCREENS = ("splash", "home", "instructions", "mode", "game", "custom")
+
+
+class Probe:
+
+    """Drives a Runner frame by frame and records render times, input latencies and CPU use per screen."""
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.results = {
+            screen: {"render": [], "latency": [], "cpu": 0.0, "wall": 0.0}
+            for screen in SCREENS
+        }
+
+    def frame(self):
+        """Runs one iteration of the game loop without waiting, returns True if a frame was drawn."""
+        runner = self.runner
+        runner.handle_events(pygame.event.get())
+        runner.update()
+        screen = runner.screen_name()
+        start = time.perf_counter()
+        drawn = runner.draw()
+        if drawn:
+            self.results[screen]["render"].append(time.perf_counter() - start)
+        return drawn
+
+    def send(self, *events):
+        """Posts the events and runs the loop until they are on screen, recording the latency."""
+        for event in events:
+            pygame.event.post(event)
+        start = time.perf_counter()
+        while not self.frame():
+            pass
+        screen = self.runner.screen_name()
+        self.results[screen]["latency"].append(time.perf_counter() - start)
+
+    def click(self, pos):
+        """Moves the mouse to pos and clicks there."""
+        self.send(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+        self.send(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+
+    def key(self, key, mod=0):
+        """Presses the key."""
+        self.send(pygame.event.Event(pygame.KEYDOWN, key=key, mod=mod))
+
+    def until(self, condition, timeout=60):
+        """Runs the loop at its frame cap until condition() holds."""
+        end = time.perf_counter() + timeout
+        while not condition():
+            if time.perf_counter() > end:
+                raise TimeoutError("The game did not reach the expected state.")
+            self.frame()
+            self.runner.clock.tick(self.runner.fps)
+
+    def idle(self, seconds):
+        """Runs the real game loop without input for seconds and records its CPU use."""
+        runner = self.runner
+        screen = runner.screen_name()
+        start, cpu = time.perf_counter(), time.process_time()
+        end = start + seconds
+        while time.perf_counter() < end:
+            runner.step(timeout=max(1, int(1000 * (end - time.perf_counter()))))
+        self.results[screen]["cpu"] += time.process_time() - cpu
+        self.results[screen]["wall"] += time.perf_counter() - start
+
+
+def play(probe, rounds, idle):
+    """Plays the scripted session over all screens."""
+    runner = probe.runner
+
+    # Splash and home screens
+    probe.until(lambda: runner.home)
+    probe.idle(idle)
+    for pos in (play_button_rect.center, info_button_rect.center, (10, 10)):
+        probe.send(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+
+    # Instructions screen and back
+    probe.click(info_button_rect.center)
+    probe.idle(idle)
+    probe.click(back_button_rect.center)
+
+    # Mode screen, then a hard game
+    probe.click(play_button_rect.center)
+    probe.idle(idle)
+    probe.click(runner.mode_rects["Hard"].center)
+    probe.until(lambda: runner.solve is not None)
+    probe.idle(idle)
+
+    for _ in range(rounds):
+        # Type digits into empty cells, then take them back
+        empty = [
+            (i, j)
+            for i in range(9)
+            for j in range(9)
+            if not runner.game.get_cell(i + 1, j + 1).get_value()
+        ]
+        for i, j in empty[:9]:
+            probe.click(cells[i][j].center)
+            probe.key(pygame.K_1 + random.randrange(9))
+        for arrow in (pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT, pygame.K_UP):
+            probe.key(arrow)
+        for _ in range(3):
+            probe.key(pygame.K_z, pygame.KMOD_CTRL)
+
+        # Hints, Solve and Reset
+        for _ in range(3):
+            probe.click(ai_button.center)
+        probe.click(solve_button.center)
+        probe.click(reset_button.center)
+    probe.idle(idle)
+
+    # Custom screen, generate and validate a puzzle, then play it
+    probe.click(home_button.center)
+    probe.click(play_button_rect.center)
+    probe.click(runner.mode_rects["Custom"].center)
+    probe.idle(idle)
+    for _ in range(rounds):
+        probe.click(generate_button.center)
+        probe.click(valid_button.center)
+        probe.until(lambda: runner.validating is None)
+    probe.click(play_button.center)
+    probe.until(lambda: runner.validating is None)
+
+
+def summary(results):
+    """Returns the per screen report of the recorded results."""
+    report = dict()
+    for screen, result in results.items():
+        renders, latencies = result["render"], result["latency"]
+        report[screen] = {
+            "frames": len(renders),
+            "render_p50": percentile(renders, 0.50) if renders else None,
+            "render_p90": percentile(renders, 0.90) if renders else None,
+            "render_max": max(renders) if renders else None,
+            "inputs": len(latencies),
+            "latency_p50": percentile(latencies, 0.50) if latencies else None,
+            "latency_p90": percentile(latencies, 0.90) if latencies else None,
+            "latency_max": max(latencies) if latencies else None,
+            "idle_cpu": result["cpu"] / result["wall"] if result["wall"] else None,
+        }
+    return report
+
+
+def print_report(report):
+    """Prints the per screen report, times in milliseconds and idle CPU as a share of a core."""
+    columns = ("frames", "render_p50", "render_p90", "render_max", "inputs")
+    columns += ("latency_p50", "latency_p90", "latency_max", "idle_cpu")
+    print(f'{"screen":<13}' + "".join(f"{c:>13}" for c in columns))
+    for screen, summary in report["screens"].items():
+        row = f"{screen:<13}"
+        for column in columns:
+            value = summary[column]
+            if value is None:
+                cell = "-"
+            elif column == "idle_cpu":
+                cell = f"{100 * value:.1f}%"
+            elif isinstance(value, float):
+                cell = f"{value * 1000:.2f}ms"
+            else:
+                cell = str(value)
+            row += f"{cell:>13}"
+        print(row)
+
+
+def main(argv=None):
+    """Runs the UI benchmark from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the game window headless with scripted input."
+    )
+    parser.add_argument("--fps", type=int, default=FPS, help="frame cap of the game loop")
+    parser.add_argument("-r", "--rounds", type=int, default=3, help="scripted rounds per screen")
+    parser.add_argument(
+        "--idle", type=float, default=1.0, help="seconds of idle CPU measurement per screen"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    # Nothing is kept between runs, a small pool is filled before measuring
+    runner = Runner(fps=args.fps, pool_path=None, cache_path=None, pool_size=1)
+    while runner.pool.next_difficulty() is not None:
+        time.sleep(0.05)
+    probe = Probe(runner)
+    try:
+        play(probe, args.rounds, args.idle)
+    finally:
+        runner.quit()
+
+    report = {
+        "fps": args.fps,
+        "video_driver": environ["SDL_VIDEODRIVER"],
+        "screens": summary(probe.results),
+    }
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(report, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())